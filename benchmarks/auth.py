@@ -0,0 +1,46 @@
+import argparse
+import json
+from timeit import repeat
+
+from jwt import decode
+
+from madr_fastapi.security import (
+    create_access_token,
+    decode_access_token,
+    settings,
+    token_cache,
+)
+
+
+def uncached(token: str):
+    return decode(token, settings.SECRET_KEY, algorithms=settings.ALGORITHM)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare cached and uncached JWT verification.'
+    )
+    parser.add_argument('--number', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    token = create_access_token({'sub': 'bench@test.com'})
+    token_cache.clear()
+
+    results = {}
+    for name, fn in (('uncached', uncached), ('cached', decode_access_token)):
+        best = min(
+            repeat(lambda: fn(token), number=args.number, repeat=args.repeat)
+        )
+        results[name] = {'us_per_request': best / args.number * 1e6}
+
+    results['speedup'] = (
+        results['uncached']['us_per_request']
+        / results['cached']['us_per_request']
+    )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
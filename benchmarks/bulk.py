@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from madr_fastapi.app import app
+from madr_fastapi.database import get_session
+from madr_fastapi.models import Book, Novelist, User, table_registry
+from madr_fastapi.security import get_current_user
+
+
+async def run(database_url: str, items: int, batch: int) -> dict:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(insert(Novelist), [{'name': 'benchmark'}])
+
+    async def session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = session_override
+    app.dependency_overrides[get_current_user] = lambda: User(
+        username='benchmark', email='benchmark@madr', password=''
+    )
+
+    books = [
+        {'title': f'book {i}', 'year': 2000, 'novelist_id': 1}
+        for i in range(items)
+    ]
+    results = {'items': items, 'batch': batch}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url='http://test') as ac:
+        start = perf_counter()
+        for book in books:
+            await ac.post('/books/', json=book)
+        results['single_seconds'] = perf_counter() - start
+
+        async with engine.begin() as conn:
+            await conn.execute(delete(Book))
+
+        start = perf_counter()
+        for offset in range(0, items, batch):
+            await ac.post('/books/bulk', json=books[offset : offset + batch])
+        results['bulk_seconds'] = perf_counter() - start
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    results['single_rows_per_second'] = items / results['single_seconds']
+    results['bulk_rows_per_second'] = items / results['bulk_seconds']
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare POST /books/ and POST /books/bulk throughput.'
+    )
+    parser.add_argument(
+        '--database-url',
+        help='scratch database, its tables are dropped (default: SQLite)',
+    )
+    parser.add_argument('--items', type=int, default=2_000)
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or (
+            f'sqlite+aiosqlite:///{Path(tmp) / "bulk.db"}'
+        )
+        results = asyncio.run(run(database_url, args.items, args.batch))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,556 @@
+import argparse
+import asyncio
+import json
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http import HTTPStatus
+from pathlib import Path
+from statistics import quantiles
+from time import perf_counter
+
+import uvicorn
+from faker import Faker
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from madr_fastapi.app import app
+from madr_fastapi.cache import principal_cache, response_cache
+from madr_fastapi.database import (
+    enable_foreign_keys,
+    get_read_session,
+    get_session,
+)
+from madr_fastapi.models import Book, Novelist, User, table_registry
+from madr_fastapi.pagination import count_cache
+from madr_fastapi.security import get_password_hash, token_cache
+from tests.conftest import BookFactory, NovelistFactory, UserFactory
+
+PASSWORD = 'benchmark'
+BULK_SIZE = 100
+HASHING_REQUESTS = 50
+
+
+@dataclass
+class Volumes:
+    users: int
+    novelists: int
+    books: int
+
+
+@dataclass
+class StatementCounter:
+    count: int = 0
+    # An external server runs its own engine, so its statements cannot be
+    # observed from here.
+    enabled: bool = True
+
+    def record(self, *args) -> None:
+        self.count += 1
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: object
+    json: object = None
+    form: object = None
+    max_requests: int | None = None
+
+    def request(self, i: int, volumes: Volumes) -> dict:
+        def resolve(value):
+            return value(i, volumes) if callable(value) else value
+
+        return {
+            'method': self.method,
+            'url': resolve(self.path),
+            'json': resolve(self.json),
+            'data': resolve(self.form),
+        }
+
+
+def bulk_titles(i: int, volumes: Volumes) -> list[dict]:
+    return [
+        {'title': f'bench bulk {i}-{j}', 'year': 2000, 'novelist_id': 1}
+        for j in range(BULK_SIZE)
+    ]
+
+
+def bulk_updates(i: int, volumes: Volumes) -> list[dict]:
+    return [
+        {'id': (i * BULK_SIZE + j) % volumes.books + 1, 'year': 1900 + j}
+        for j in range(BULK_SIZE)
+    ]
+
+
+# Ordered so that writes never remove rows a later read depends on; the
+# deletes walk the seeded ids from the top down.
+SCENARIOS = [
+    Scenario('root', 'GET', '/'),
+    Scenario(
+        'auth.token',
+        'POST',
+        '/auth/token',
+        form={'username': 'bench@madr.dev', 'password': PASSWORD},
+        max_requests=HASHING_REQUESTS,
+    ),
+    Scenario('auth.refresh', 'POST', '/auth/refresh_token'),
+    Scenario('users.list', 'GET', '/users/?limit=20'),
+    Scenario('users.get', 'GET', '/users/1'),
+    Scenario(
+        'users.create',
+        'POST',
+        '/users/',
+        json=lambda i, v: {
+            'username': f'bench new {i}',
+            'email': f'bench{i}@new.madr.dev',
+            'password': PASSWORD,
+        },
+        max_requests=HASHING_REQUESTS,
+    ),
+    Scenario(
+        'users.update',
+        'PUT',
+        '/users/1',
+        json={
+            'username': 'bench',
+            'email': 'bench@madr.dev',
+            'password': PASSWORD,
+        },
+        max_requests=HASHING_REQUESTS,
+    ),
+    Scenario('novelists.list', 'GET', '/novelists/?limit=20'),
+    Scenario(
+        'novelists.list_pages',
+        'GET',
+        lambda i, v: f'/novelists/?limit=20&page={i % 50 + 1}&count=exact',
+    ),
+    Scenario(
+        'novelists.list_include_books',
+        'GET',
+        '/novelists/?limit=20&include=books',
+    ),
+    Scenario('novelists.search', 'GET', '/novelists/?search=maria'),
+    Scenario(
+        'novelists.get',
+        'GET',
+        lambda i, v: f'/novelists/{i % v.novelists + 1}',
+    ),
+    Scenario(
+        'novelists.get_include_books',
+        'GET',
+        lambda i, v: f'/novelists/{i % v.novelists + 1}?include=books',
+    ),
+    Scenario('novelists.export', 'GET', '/novelists/export?format=ndjson'),
+    Scenario(
+        'novelists.create',
+        'POST',
+        '/novelists/',
+        json=lambda i, v: {'name': f'bench novelist {i}'},
+    ),
+    Scenario(
+        'novelists.bulk',
+        'POST',
+        '/novelists/bulk',
+        json=lambda i, v: [
+            {'name': f'bench bulk novelist {i}-{j}'} for j in range(BULK_SIZE)
+        ],
+    ),
+    Scenario(
+        'novelists.patch',
+        'PATCH',
+        lambda i, v: f'/novelists/{i % v.novelists + 1}',
+        json=lambda i, v: {'name': f'bench renamed novelist {i}'},
+    ),
+    Scenario('books.list', 'GET', '/books/?limit=20'),
+    Scenario(
+        'books.list_pages',
+        'GET',
+        lambda i, v: f'/books/?limit=20&page={i % 50 + 1}&count=estimated',
+    ),
+    Scenario(
+        'books.filter_year',
+        'GET',
+        lambda i, v: f'/books/?year={1900 + i % 126}',
+    ),
+    Scenario('books.filter_title', 'GET', '/books/?title=the'),
+    Scenario('books.search', 'GET', '/books/?search=the'),
+    Scenario('books.get', 'GET', lambda i, v: f'/books/{i % v.books + 1}'),
+    Scenario('books.export', 'GET', '/books/export?format=csv'),
+    Scenario(
+        'books.create',
+        'POST',
+        '/books/',
+        json=lambda i, v: {
+            'title': f'bench book {i}',
+            'year': 2000,
+            'novelist_id': 1,
+        },
+    ),
+    Scenario('books.bulk', 'POST', '/books/bulk', json=bulk_titles),
+    Scenario('books.bulk_update', 'PATCH', '/books/bulk', json=bulk_updates),
+    Scenario(
+        'books.patch',
+        'PATCH',
+        lambda i, v: f'/books/{i % v.books + 1}',
+        json=lambda i, v: {'year': 1900 + i % 126},
+    ),
+    Scenario('metrics.pool', 'GET', '/metrics/pool'),
+    Scenario('metrics.hashing', 'GET', '/metrics/hashing'),
+    Scenario(
+        'books.delete', 'DELETE', lambda i, v: f'/books/{v.books - i}'
+    ),
+    Scenario(
+        'books.bulk_delete',
+        'DELETE',
+        '/books/bulk',
+        json=lambda i, v: list(
+            range(v.books // 2 - (i + 1) * 10, v.books // 2 - i * 10)
+        ),
+    ),
+    Scenario(
+        'novelists.delete',
+        'DELETE',
+        lambda i, v: f'/novelists/{v.novelists - i}',
+    ),
+]
+
+
+async def seed(engine, volumes: Volumes, seed: int) -> None:
+    Faker.seed(seed)
+    UserFactory.reset_sequence()
+    password = get_password_hash(PASSWORD)
+
+    users = [
+        {'username': 'bench', 'email': 'bench@madr.dev', 'password': password}
+    ]
+    for _ in range(volumes.users - 1):
+        user = UserFactory.build(password=password)
+        users.append({
+            'username': user.username,
+            'email': user.email,
+            'password': user.password,
+        })
+
+    # The factories draw realistic names and years; the index suffix keeps
+    # the normalized keys unique at any volume.
+    novelists = [
+        {'name': f'{NovelistFactory.build().name} {i}'}
+        for i in range(volumes.novelists)
+    ]
+    books = []
+    for i in range(volumes.books):
+        book = BookFactory.build()
+        books.append({
+            'title': f'{book.title} {i}',
+            'year': book.year,
+            'novelist_id': i % volumes.novelists + 1,
+        })
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(insert(User), users)
+        await conn.execute(insert(Novelist), novelists)
+        for start in range(0, len(books), 10_000):
+            await conn.execute(insert(Book), books[start : start + 10_000])
+
+
+async def reset_caches() -> None:
+    await principal_cache.clear()
+    await response_cache.clear()
+    count_cache.clear()
+    token_cache.clear()
+
+
+def summarize(
+    latencies: list[float], elapsed: float, statements: int | None
+) -> dict:
+    ms = sorted(latency * 1000 for latency in latencies)
+    cuts = quantiles(ms, n=100, method='inclusive') if len(ms) > 1 else ms * 99
+
+    return {
+        'requests': len(ms),
+        'rps': len(ms) / elapsed if elapsed else 0,
+        'p50_ms': cuts[49],
+        'p95_ms': cuts[94],
+        'p99_ms': cuts[98],
+        'max_ms': ms[-1],
+        'statements_per_request': (
+            None if statements is None else statements / len(ms)
+        ),
+    }
+
+
+async def run_scenario(client, scenario, volumes, args, counter) -> dict:
+    total = min(args.requests, scenario.max_requests or args.requests)
+    indexes = iter(range(total))
+    latencies = []
+    statuses = Counter()
+
+    async def worker():
+        for i in indexes:
+            start = perf_counter()
+            response = await client.request(**scenario.request(i, volumes))
+            await response.aread()
+            latencies.append(perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    statements = counter.count
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = perf_counter() - start
+
+    summary = summarize(
+        latencies,
+        elapsed,
+        counter.count - statements if counter.enabled else None,
+    )
+    summary['errors'] = sum(
+        count
+        for status, count in statuses.items()
+        if status >= HTTPStatus.BAD_REQUEST
+    )
+    summary['statuses'] = {
+        str(status): count for status, count in sorted(statuses.items())
+    }
+
+    return summary
+
+
+async def authenticate(client) -> dict:
+    response = await client.post(
+        '/auth/token',
+        data={'username': 'bench@madr.dev', 'password': PASSWORD},
+    )
+    response.raise_for_status()
+
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+async def run_suite(client, mode, args, volumes, counter) -> dict:
+    client.headers.update(await authenticate(client))
+
+    results = {}
+    for scenario in SCENARIOS:
+        if args.only and not any(
+            scenario.name.startswith(prefix) for prefix in args.only
+        ):
+            continue
+        results[scenario.name] = await run_scenario(
+            client, scenario, volumes, args, counter
+        )
+        print(
+            f'{mode:>6}  {scenario.name:<32}'
+            f'{results[scenario.name]["p50_ms"]:>9.2f} ms p50',
+            file=sys.stderr,
+        )
+
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def run_mode(mode: str, engine, args, volumes, counter) -> dict:
+    await seed(engine, volumes, args.seed)
+    await reset_caches()
+    counter.enabled = not (args.url and mode == 'socket')
+
+    if mode == 'asgi':
+        transport = ASGITransport(app=app, raise_app_exceptions=False)
+        async with AsyncClient(
+            transport=transport, base_url='http://bench'
+        ) as client:
+            return await run_suite(client, mode, args, volumes, counter)
+
+    if args.url:
+        async with AsyncClient(base_url=args.url) as client:
+            return await run_suite(client, mode, args, volumes, counter)
+
+    # Same event loop as the client, but every request crosses a real
+    # loopback socket and the HTTP parser uvicorn uses in production.
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app,
+            host='127.0.0.1',
+            port=port,
+            http=args.http,
+            lifespan='off',
+            log_level='warning',
+            access_log=False,
+        )
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    try:
+        async with AsyncClient(base_url=f'http://127.0.0.1:{port}') as client:
+            return await run_suite(client, mode, args, volumes, counter)
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def run(args) -> dict:
+    engine = create_async_engine(args.database_url)
+    enable_foreign_keys(engine)
+    volumes = Volumes(args.users, args.novelists, args.books)
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, 'before_cursor_execute', counter.record)
+
+    async def session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = session_override
+    app.dependency_overrides[get_read_session] = session_override
+
+    results = {}
+    try:
+        for mode in args.modes:
+            results[mode] = await run_mode(
+                mode, engine, args, volumes, counter
+            )
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    return results
+
+
+def git_revision() -> dict:
+    def git(*command):
+        return subprocess.run(
+            ['git', *command], capture_output=True, text=True, check=False
+        ).stdout.strip()
+
+    return {
+        'commit': git('rev-parse', 'HEAD') or None,
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+    }
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    changes = {}
+    for mode, scenarios in results['results'].items():
+        for name, current in scenarios.items():
+            before = baseline['results'].get(mode, {}).get(name)
+            if not before:
+                continue
+            changes[f'{mode}:{name}'] = {
+                'p50_ratio': current['p50_ms'] / before['p50_ms'],
+                'rps_ratio': current['rps'] / before['rps'],
+                'statements_delta': (
+                    None
+                    if current['statements_per_request'] is None
+                    or before['statements_per_request'] is None
+                    else current['statements_per_request']
+                    - before['statements_per_request']
+                ),
+            }
+
+    mismatched = [
+        key
+        for key in ('database', 'volumes', 'requests', 'concurrency', 'seed')
+        if results['meta'][key] != baseline['meta'].get(key)
+    ]
+
+    return {
+        'baseline': baseline['meta'].get('git'),
+        'mismatched': mismatched,
+        'changes': changes,
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Load test every MADR endpoint and report latency '
+        'percentiles, throughput and SQL statements per request.',
+    )
+    parser.add_argument(
+        '--database-url',
+        help='scratch database, its tables are dropped (default: SQLite)',
+    )
+    parser.add_argument(
+        '--mode',
+        dest='modes',
+        choices=['asgi', 'socket'],
+        action='append',
+        help='repeatable; defaults to both',
+    )
+    parser.add_argument(
+        '--url',
+        help='drive an already running server in socket mode; it must use '
+        '--database-url, and its statements are not counted',
+    )
+    parser.add_argument('--http', default='httptools')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--novelists', type=int, default=1_000)
+    parser.add_argument('--books', type=int, default=10_000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument(
+        '--only', nargs='+', metavar='PREFIX', help='e.g. books. auth.'
+    )
+    parser.add_argument('--output', type=Path, help='also write JSON here')
+    parser.add_argument(
+        '--compare', type=Path, metavar='BASELINE', help='earlier --output'
+    )
+    args = parser.parse_args(argv)
+    args.modes = args.modes or ['asgi', 'socket']
+
+    if args.books < args.requests * 20 or args.novelists < args.requests:
+        parser.error('seed at least --requests novelists and 20x books')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.database_url = args.database_url or (
+            f'sqlite+aiosqlite:///{Path(tmp) / "load.db"}'
+        )
+        results = asyncio.run(run(args))
+
+    report = {
+        'meta': {
+            'git': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': args.database_url.split(':', 1)[0],
+            'volumes': {
+                'users': args.users,
+                'novelists': args.novelists,
+                'books': args.books,
+            },
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.compare:
+        report['comparison'] = compare(
+            report, json.loads(args.compare.read_text())
+        )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
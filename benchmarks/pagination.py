@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from madr_fastapi.models import Book, Novelist, table_registry
+from madr_fastapi.pagination import encode_cursor, paginate
+from madr_fastapi.schemas import BookFilter
+
+
+async def seed(engine, rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(insert(Novelist), [{'name': 'benchmark'}])
+
+        batch = 10_000
+        for start in range(0, rows, batch):
+            await conn.execute(
+                insert(Book),
+                [
+                    {'title': f'book {i}', 'year': 2000, 'novelist_id': 1}
+                    for i in range(start, min(start + batch, rows))
+                ],
+            )
+
+
+async def time_page(session, book_filter, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        await paginate(session, select(Book), book_filter, Book.id)
+        timings.append(perf_counter() - start)
+
+    return median(timings) * 1000
+
+
+async def run(database_url: str, pages: list[int], limit: int, repeat: int):
+    engine = create_async_engine(database_url)
+    await seed(engine, max(pages) * limit)
+
+    results = []
+    async with AsyncSession(engine) as session:
+        for page in pages:
+            last_id = (page - 1) * limit
+            offset_filter = BookFilter(page=page, limit=limit)
+            cursor_filter = BookFilter(
+                limit=limit,
+                cursor=encode_cursor(last_id) if last_id else None,
+            )
+            results.append({
+                'page': page,
+                'offset_ms': await time_page(session, offset_filter, repeat),
+                'cursor_ms': await time_page(session, cursor_filter, repeat),
+            })
+
+    await engine.dispose()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare offset and keyset page latency on /books.'
+    )
+    parser.add_argument(
+        '--database-url',
+        help='scratch database, its tables are dropped (default: SQLite)',
+    )
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10_000])
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or (
+            f'sqlite+aiosqlite:///{Path(tmp) / "pagination.db"}'
+        )
+        results = asyncio.run(
+            run(database_url, args.pages, args.limit, args.repeat)
+        )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
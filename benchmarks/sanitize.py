@@ -0,0 +1,110 @@
+import argparse
+import json
+import random
+from timeit import repeat
+
+from madr_fastapi.utils import (
+    sanitize_name,
+    sanitize_name_cached,
+    sanitize_names,
+)
+from tests.test_utils import reference_sanitize_name
+
+WORDS = [
+    'Dom',
+    'Casmurro',
+    'Memórias',
+    'Póstumas',
+    'de',
+    'Brás',
+    'Cubas',
+    'Iracema',
+    'O',
+    'Cortiço',
+    'Grande',
+    'Sertão:',
+    'Veredas',
+    'Vidas',
+    'Secas',
+    'A',
+    'Hora',
+    'da',
+    'Estrela',
+    'São',
+    'Bernardo',
+    'Macunaíma',
+    '—',
+    'Vol.',
+    '2',
+    '(Edição',
+    'Crítica)',
+    "l'Étranger",
+    'Crime',
+    'and',
+    'Punishment',
+    'The',
+    'Old',
+    'Man',
+    'Sea',
+]
+
+
+def titles(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+
+    return [
+        ' '.join(rng.choices(WORDS, k=rng.randint(1, 6)))
+        for _ in range(count)
+    ]
+
+
+def best(statement, number: int, times: int) -> float:
+    return min(repeat(statement, number=number, repeat=times)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare sanitize_name with the original implementation.'
+    )
+    parser.add_argument('--titles', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    names = titles(args.titles, seed=42)
+    ascii_names = [name for name in names if name.isascii()]
+
+    def cold():
+        sanitize_name_cached.cache_clear()
+        for name in names:
+            sanitize_name(name)
+
+    results = {
+        'titles': len(names),
+        'ascii_share': len(ascii_names) / len(names),
+        'reference_ms': best(
+            lambda: [reference_sanitize_name(name) for name in names],
+            1,
+            args.repeat,
+        ),
+        'sanitize_name_cold_ms': best(cold, 1, args.repeat),
+        'sanitize_name_warm_ms': best(
+            lambda: [sanitize_name(name) for name in names], 1, args.repeat
+        ),
+        'sanitize_names_ms': best(
+            lambda: sanitize_names(names), 1, args.repeat
+        ),
+        'ascii_reference_ms': best(
+            lambda: [reference_sanitize_name(name) for name in ascii_names],
+            1,
+            args.repeat,
+        ),
+        'ascii_sanitize_names_ms': best(
+            lambda: sanitize_names(ascii_names), 1, args.repeat
+        ),
+    }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,4 @@
 #!/bin/sh
 
-# Executa as migrações do banco de dados
-poetry run alembic upgrade head
-
-# Inicia a aplicação
-poetry run uvicorn --host 0.0.0.0 --port 8000 madr_fastapi.app:app
\ No newline at end of file
+# Aplica as migrações uma única vez e inicia os workers da aplicação
+exec poetry run python -m madr_fastapi.serve
@@ -1,15 +1,56 @@
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 
-from madr_fastapi.routers import auth, books, novelists, users
+from madr_fastapi.database import replica_router, sticky_key
+from madr_fastapi.hashing import hashing_executor
+from madr_fastapi.prometheus import MetricsMiddleware
+from madr_fastapi.routers import auth, books, metrics, novelists, users
+from madr_fastapi.settings import Settings
 
-app = FastAPI(title='Projeto MADR')
+settings = Settings()  # type: ignore
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    hashing_executor.shutdown()
+    await replica_router.dispose()
+
+
+class ReadYourWritesMiddleware:
+    safe_methods = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] in self.safe_methods:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marking_writes(message):
+            if (
+                message['type'] == 'http.response.start'
+                and message['status'] < HTTPStatus.BAD_REQUEST
+            ):
+                authorization = Request(scope).headers.get('authorization')
+                await replica_router.mark_write(sticky_key(authorization))
+            await send(message)
+
+        await self.app(scope, receive, send_marking_writes)
+
+
+app = FastAPI(title='Projeto MADR', lifespan=lifespan)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(MetricsMiddleware, settings=settings)
 
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(novelists.router)
 app.include_router(books.router)
+app.include_router(metrics.router)
 
 
 @app.get('/', status_code=HTTPStatus.OK)
@@ -0,0 +1,293 @@
+import json
+from collections import OrderedDict
+from time import monotonic
+from uuid import uuid4
+
+from pydantic import BaseModel
+from sqlalchemy.orm import make_transient_to_detached
+
+from madr_fastapi.models import User
+from madr_fastapi.settings import Settings
+
+settings = Settings()  # type: ignore
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._data: OrderedDict = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        self._data[key] = (monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize, ttl)
+
+    async def get(self, key: str):
+        return self.cache.get(key)
+
+    async def set(self, key: str, value, ttl: float | None = None) -> None:
+        self.cache.set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.cache.delete(key)
+
+    async def clear(self) -> None:
+        self.cache.clear()
+
+
+class RedisBackend:
+    def __init__(self, client, ttl: float, prefix: str):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str):
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        await self.client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=self.prefix + '*'):
+            await self.client.delete(key)
+
+
+def create_backend(url: str | None, maxsize: int, ttl: float, prefix: str):
+    if not url:
+        return MemoryBackend(maxsize, ttl)
+
+    try:
+        from redis.asyncio import Redis  # noqa: PLC0415
+    except ImportError:  # pragma: no cover
+        raise RuntimeError(
+            'The redis package is required to use a shared cache backend.'
+        )
+
+    return RedisBackend(Redis.from_url(url), ttl, prefix)
+
+
+class PrincipalCache:
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def get(self, subject: str) -> User | None:
+        data = await self.backend.get(subject)
+
+        if data is None:
+            return None
+
+        principal = json.loads(data)
+
+        # The password hash stays in the database; leaving it unset marks
+        # the attribute expired once the principal is attached.
+        user = User.__mapper__.class_manager.new_instance()
+        user.id = principal['id']
+        user.username = principal['username']
+        user.email = principal['email']
+        user.token_version = principal['token_version']
+        make_transient_to_detached(user)
+
+        return user
+
+    async def set(self, subject: str, user: User) -> None:
+        data = json.dumps({
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'token_version': user.token_version,
+        })
+
+        await self.backend.set(subject, data)
+
+    async def invalidate(self, *subjects: str) -> None:
+        await self.backend.delete(*subjects)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+
+principal_cache = PrincipalCache(
+    create_backend(
+        settings.PRINCIPAL_CACHE_URL,
+        settings.PRINCIPAL_CACHE_SIZE,
+        settings.PRINCIPAL_CACHE_TTL,
+        prefix='madr:principal:',
+    )
+)
+
+
+# Generations and settling marks hold one entry per table. They live in a
+# store of their own, so evicting or expiring bodies never drops them, and
+# they outlast any body cached under them.
+GENERATION_CACHE_SIZE = 64
+GENERATION_TTL = 24 * 60 * 60
+
+
+class ResponseCache:
+    def __init__(self, backend, generations=None, settle_seconds: float = 0):
+        self.backend = backend
+        self.generations = generations or backend
+        self.settle_seconds = settle_seconds
+
+    async def _generation(self, table: str) -> str:
+        key = f'generation:{table}'
+        generation = await self.generations.get(key)
+
+        # A missing generation (never set or expired) starts a new one, so
+        # older entries can never be served again.
+        if generation is None:
+            generation = uuid4().hex
+            await self.generations.set(key, generation)
+
+        if isinstance(generation, bytes):
+            generation = generation.decode()
+
+        return generation
+
+    async def key(self, scope: str, params: BaseModel, *tables: str) -> str:
+        generations = [await self._generation(table) for table in tables]
+
+        return f'{scope}:{":".join(generations)}:{params.model_dump_json()}'
+
+    async def get(self, key: str) -> tuple[str, bytes] | None:
+        value = await self.backend.get(key)
+
+        if value is None:
+            return None
+
+        etag, body = value.split(b'\n', 1)
+
+        return etag.decode(), body
+
+    async def set(self, key: str, etag: str, body: bytes) -> None:
+        await self.backend.set(key, etag.encode() + b'\n' + body)
+
+    async def lookup(self, key: str, read_from: str = 'primary'):
+        # A caller that just wrote reads the primary; a cached body could
+        # predate its write.
+        if read_from == 'sticky':
+            return None
+
+        return await self.get(key)
+
+    async def store(
+        self,
+        key: str,
+        etag: str,
+        body: bytes,
+        *tables: str,
+        read_from: str = 'primary',
+    ) -> None:
+        if read_from == 'sticky':
+            return
+
+        # Right after a write a lagging replica can still return the old
+        # rows; they must not fill the new generation.
+        if read_from == 'replica' and await self.settling(*tables):
+            return
+
+        await self.set(key, etag, body)
+
+    async def settling(self, *tables: str) -> bool:
+        for table in tables:
+            if await self.generations.get(f'settling:{table}') is not None:
+                return True
+
+        return False
+
+    async def invalidate(self, *tables: str) -> None:
+        for table in tables:
+            await self.generations.set(f'generation:{table}', uuid4().hex)
+            if self.settle_seconds > 0:
+                await self.generations.set(
+                    f'settling:{table}', b'1', self.settle_seconds
+                )
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+        await self.generations.clear()
+
+
+response_cache = ResponseCache(
+    create_backend(
+        settings.RESPONSE_CACHE_URL,
+        settings.RESPONSE_CACHE_SIZE,
+        settings.RESPONSE_CACHE_TTL,
+        prefix='madr:response:',
+    ),
+    generations=create_backend(
+        settings.RESPONSE_CACHE_URL,
+        GENERATION_CACHE_SIZE,
+        GENERATION_TTL,
+        prefix='madr:generation:',
+    ),
+    settle_seconds=(
+        settings.READ_YOUR_WRITES_SECONDS if settings.READ_DATABASE_URLS else 0
+    ),
+)
@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from madr_fastapi.models import Book, Novelist, User, table_registry
+from madr_fastapi.pagination import encode_cursor, page_query
+from madr_fastapi.schemas import (
+    BookExport,
+    BookExportFilter,
+    BookFilter,
+    NovelistFilter,
+)
+from madr_fastapi.services import export_query, filter_books, filter_novelists
+from madr_fastapi.settings import Settings
+
+
+def router_queries(dialect: str) -> dict:
+    def books(**criteria):
+        book_filter = BookFilter(**criteria)
+        return page_query(
+            filter_books(book_filter, dialect),
+            book_filter,
+            Book.id,
+            seek=not book_filter.search,
+        )
+
+    def novelists(**criteria):
+        novelist_filter = NovelistFilter(**criteria)
+        return page_query(
+            filter_novelists(novelist_filter, dialect),
+            novelist_filter,
+            Novelist.id,
+            seek=not novelist_filter.search,
+        )
+
+    def export_books(**criteria):
+        export_filter = BookExportFilter(**criteria)
+        return export_query(
+            filter_books(export_filter, dialect),
+            Book,
+            BookExport,
+            export_filter,
+        )
+
+    return {
+        'get_current_user': select(User).where(User.email == 'user1@madr'),
+        'get_book_or_return_404': select(Book).where(Book.id == 1),
+        'list_books': books(),
+        'list_books?cursor': books(cursor=encode_cursor(100)),
+        'list_books?year': books(year=2000),
+        'list_books?title': books(title='book 1'),
+        'list_books?search': books(search='book'),
+        'export_books?updated_since': export_books(
+            updated_since='2100-01-01T00:00:00'
+        ),
+        'novelist_books': select(Book).where(Book.novelist_id == 1),
+        'get_novelist_or_return_404': select(Novelist).where(
+            Novelist.id == 1
+        ),
+        'list_novelists': novelists(),
+        'list_novelists?name': novelists(name='novelist 1'),
+        'list_novelists?search': novelists(search='novelist'),
+    }
+
+
+async def seed(conn, rows: int) -> None:
+    novelists = max(rows // 10, 1)
+
+    await conn.execute(
+        insert(Novelist), [{'name': f'novelist {i}'} for i in range(novelists)]
+    )
+    await conn.execute(
+        insert(Book),
+        [
+            {
+                'title': f'book {i}',
+                'year': 1900 + i % 126,
+                'novelist_id': i % novelists + 1,
+            }
+            for i in range(rows)
+        ],
+    )
+    await conn.execute(
+        insert(User),
+        [
+            {
+                'username': f'user{i}',
+                'email': f'user{i}@madr',
+                'password': 'not-a-hash',
+            }
+            for i in range(novelists)
+        ],
+    )
+
+
+def sequential_scans(dialect: str, plan: list[str]) -> list[str]:
+    if dialect == 'postgresql':
+        return [line.strip() for line in plan if 'Seq Scan' in line]
+
+    return [
+        line.strip()
+        for line in plan
+        if line.strip().startswith('SCAN') and 'VIRTUAL TABLE' not in line
+    ]
+
+
+async def explain(args) -> int:
+    engine = create_async_engine(args.database_url)
+    dialect = engine.dialect.name
+    prefix = 'EXPLAIN' if dialect == 'postgresql' else 'EXPLAIN QUERY PLAN'
+    found = 0
+
+    async with engine.begin() as conn:
+        if args.seed:
+            await conn.run_sync(table_registry.metadata.create_all)
+            await seed(conn, args.seed)
+            await conn.execute(text('ANALYZE'))
+
+        for name, query in router_queries(dialect).items():
+            sql = query.compile(
+                dialect=engine.dialect,
+                compile_kwargs={'literal_binds': True},
+            )
+            result = await conn.exec_driver_sql(f'{prefix} {sql}')
+            plan = [str(row[-1]) for row in result]
+            scans = sequential_scans(dialect, plan)
+            found += len(scans)
+
+            print(f'{"SEQ SCAN" if scans else "ok":>8}  {name}')
+            for line in scans if not args.verbose else plan:
+                print(f'{"":>10}{line}')
+
+        if args.seed:
+            await conn.rollback()
+
+    await engine.dispose()
+
+    print(f'{found} sequential scan(s) found.')
+
+    return 1 if found and args.strict else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='madr')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    explain_parser = commands.add_parser(
+        'explain', help='EXPLAIN every router query and report seq scans'
+    )
+    explain_parser.add_argument('--database-url')
+    explain_parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        metavar='ROWS',
+        help='create tables and seed ROWS books inside a rolled back '
+        'transaction before explaining',
+    )
+    explain_parser.add_argument(
+        '--strict',
+        action='store_true',
+        help='exit with status 1 when a sequential scan is found',
+    )
+    explain_parser.add_argument('-v', '--verbose', action='store_true')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'explain':
+        if not args.database_url:
+            args.database_url = Settings().DATABASE_URL  # type: ignore
+        return asyncio.run(explain(args))
+
+    return 0  # pragma: no cover
+
+
+if __name__ == '__main__':
+    sys.exit(main())
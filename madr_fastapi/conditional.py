@@ -0,0 +1,63 @@
+from hashlib import blake2b
+from http import HTTPStatus
+
+from fastapi import Request, Response
+
+from madr_fastapi.settings import Settings
+
+settings = Settings()  # type: ignore
+
+
+def weak_etag(*parts) -> str:
+    digest = blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+
+    return f'W/"{digest}"'
+
+
+def row_version(row) -> tuple:
+    # SQLite can hand a deleted row's id to a new row, whose version starts
+    # over at 1; updated_at tells the two apart.
+    return row.id, row.version, row.updated_at
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == '*':
+        return True
+
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored.
+    opaque = etag.removeprefix('W/')
+
+    return any(
+        candidate.strip().removeprefix('W/') == opaque
+        for candidate in if_none_match.split(',')
+    )
+
+
+class Conditional:
+    def __init__(self, request: Request, response: Response):
+        self.request = request
+        self.response = response
+        self.headers: dict[str, str] = {}
+
+    def not_modified(self, etag: str) -> Response | None:
+        self.headers = {
+            'ETag': etag,
+            'Cache-Control': (
+                f'private, max-age={settings.HTTP_CACHE_MAX_AGE}, '
+                'must-revalidate'
+            ),
+        }
+        self.response.headers.update(self.headers)
+
+        if_none_match = self.request.headers.get('if-none-match')
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(
+                status_code=HTTPStatus.NOT_MODIFIED, headers=self.headers
+            )
+
+        return None
+
+    def json_response(self, body: bytes) -> Response:
+        return Response(
+            body, media_type='application/json', headers=self.headers
+        )
@@ -1,10 +1,320 @@
+import json
+import logging
+from collections.abc import Mapping, Sequence
+from contextlib import asynccontextmanager
+from hashlib import sha256
+from itertools import count
+from threading import Lock
+from time import perf_counter
+
+from fastapi import Request
+from sqlalchemy import event, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
+from madr_fastapi.cache import MemoryBackend, create_backend
+from madr_fastapi.prometheus import current_route, record_query
 from madr_fastapi.settings import Settings
 
-engine = create_async_engine(Settings().DATABASE_URL)  # type: ignore
+settings = Settings()  # type: ignore
+
+slow_query_logger = logging.getLogger('madr_fastapi.slow_query')
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = Lock()
+
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self.timeouts += timed_out
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            waits = self.checkouts or 1
+
+            return {
+                'pool': type(pool).__name__,
+                'size': pool.size() if hasattr(pool, 'size') else 0,
+                'overflow': (
+                    pool.overflow() if hasattr(pool, 'overflow') else 0
+                ),
+                'in_use': self.checkouts - self.checkins,
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': self.wait_seconds_total / waits * 1000,
+                'wait_max_ms': self.wait_seconds_max * 1000,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def connect(self):
+        start = perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(perf_counter() - start, timed_out=True)
+            raise
+
+        pool_metrics.record_wait(perf_counter() - start)
+
+        return connection
+
+
+def engine_options(
+    settings: Settings, url: str | None = None, replica: bool = False
+) -> dict:
+    url = make_url(url or settings.DATABASE_URL)
+
+    if settings.DATABASE_PGBOUNCER:
+        connect_args = {}
+        if url.get_driver_name() == 'psycopg':
+            connect_args = {'prepare_threshold': None}
+        elif url.get_driver_name() == 'asyncpg':
+            connect_args = {
+                'statement_cache_size': 0,
+                'prepared_statement_cache_size': 0,
+            }
+
+        return {'poolclass': NullPool, 'connect_args': connect_args}
+
+    if url.get_backend_name() == 'sqlite':
+        return {}
+
+    # pool_metrics describes the primary pool only; replica traffic is
+    # reported per replica by the ReplicaRouter.
+    poolclass = AsyncAdaptedQueuePool if replica else InstrumentedQueuePool
+
+    return {
+        'poolclass': poolclass,
+        'pool_size': settings.DATABASE_POOL_SIZE,
+        'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+        'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+    }
+
+
+def instrument_pool(engine) -> None:
+    @event.listens_for(engine.sync_engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        pool_metrics.connects += 1
+
+    @event.listens_for(engine.sync_engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, proxy):
+        pool_metrics.checkouts += 1
+
+    @event.listens_for(engine.sync_engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        pool_metrics.checkins += 1
+
+
+def instrument_queries(engine) -> None:
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def on_before_execute(conn, cursor, statement, params, context, *_):
+        if context is not None:
+            context.madr_started_at = perf_counter()
+
+    @event.listens_for(engine.sync_engine, 'after_cursor_execute')
+    def on_after_execute(conn, cursor, statement, params, context, *_):
+        if context is None:
+            return
+
+        elapsed = perf_counter() - context.madr_started_at
+        record_query(elapsed)
+
+        threshold = settings.SLOW_QUERY_MS
+        if threshold is not None and elapsed * 1000 >= threshold:
+            log_slow_query(statement, params, elapsed, context.executemany)
+
+
+def parameters_shape(params):
+    # Only types are logged: values may carry passwords, tokens or
+    # personal data.
+    if isinstance(params, Mapping):
+        return {key: type(value).__name__ for key, value in params.items()}
+
+    if isinstance(params, Sequence) and not isinstance(params, str | bytes):
+        return [type(value).__name__ for value in params]
+
+    return type(params).__name__
+
+
+def log_slow_query(
+    statement: str, params, elapsed: float, executemany: bool
+) -> None:
+    if executemany:
+        rows = list(params)
+        shape = {
+            'rows': len(rows),
+            'row': parameters_shape(rows[0]) if rows else None,
+        }
+    else:
+        shape = parameters_shape(params)
+
+    record = {
+        'event': 'slow_query',
+        'elapsed_ms': round(elapsed * 1000, 3),
+        'route': current_route(),
+        'statement': ' '.join(statement.split()),
+        'parameters': shape,
+    }
+
+    slow_query_logger.warning(json.dumps(record), extra={'slow_query': record})
+
+
+def enable_foreign_keys(engine) -> None:
+    # SQLite ignores ON DELETE CASCADE unless enforcement is switched on
+    # for every connection.
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine.sync_engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        primary,
+        replicas: list,
+        strategy: str = 'round_robin',
+        sticky_seconds: float = 5,
+        writers=None,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.strategy = strategy
+
+        self.in_use = [0] * len(replicas)
+        self.routed = [0] * len(replicas)
+        self.sticky_reads = 0
+
+        self._turn = count()
+        # Workers only see each other's writes through a shared backend.
+        self._writers = writers or MemoryBackend(65536, sticky_seconds)
+
+    async def mark_write(self, key: str | None) -> None:
+        if key and self.replicas:
+            await self._writers.set(key, b'1')
+
+    async def is_sticky(self, key: str | None) -> bool:
+        return bool(key) and await self._writers.get(key) is not None
+
+    def choose(self) -> int:
+        size = len(self.replicas)
+        turn = next(self._turn) % size
+
+        if self.strategy == 'least_connections':
+            # Ties rotate so idle replicas still share the load.
+            return min(
+                ((turn + offset) % size for offset in range(size)),
+                key=self.in_use.__getitem__,
+            )
+
+        return turn
+
+    @asynccontextmanager
+    async def session(self, sticky_key: str | None = None):
+        if not self.replicas or await self.is_sticky(sticky_key):
+            self.sticky_reads += bool(self.replicas)
+            async with AsyncSession(
+                self.primary, expire_on_commit=False
+            ) as session:
+                session.info['read_from'] = (
+                    'sticky' if self.replicas else 'primary'
+                )
+                yield session
+            return
+
+        index = self.choose()
+        self.in_use[index] += 1
+        self.routed[index] += 1
+        try:
+            async with AsyncSession(
+                self.replicas[index], expire_on_commit=False
+            ) as session:
+                session.info['read_from'] = 'replica'
+                yield session
+        finally:
+            self.in_use[index] -= 1
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.dispose()
+
+    def snapshot(self) -> dict:
+        return {
+            'strategy': self.strategy,
+            'replicas': len(self.replicas),
+            'in_use': list(self.in_use),
+            'routed': list(self.routed),
+            'sticky_reads': self.sticky_reads,
+        }
+
+
+def sticky_key(authorization: str | None) -> str | None:
+    if not authorization:
+        return None
+
+    return sha256(authorization.encode()).hexdigest()
+
+
+def create_replica_router(settings: Settings, primary) -> ReplicaRouter:
+    replicas = []
+    for url in settings.READ_DATABASE_URLS:
+        replica = create_async_engine(
+            url, **engine_options(settings, url, replica=True)
+        )
+        instrument_queries(replica)
+        replicas.append(replica)
+
+    return ReplicaRouter(
+        primary,
+        replicas,
+        settings.READ_REPLICA_STRATEGY,
+        settings.READ_YOUR_WRITES_SECONDS,
+        create_backend(
+            settings.READ_YOUR_WRITES_URL,
+            65536,
+            settings.READ_YOUR_WRITES_SECONDS,
+            prefix='madr:writer:',
+        ),
+    )
+
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings))
+instrument_pool(engine)
+instrument_queries(engine)
+enable_foreign_keys(engine)
+
+replica_router = create_replica_router(settings, engine)
 
 
 async def get_session():  # pragma: no cover
     async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
+
+
+async def get_read_session(request: Request):  # pragma: no cover
+    async with replica_router.session(
+        sticky_key(request.headers.get('authorization'))
+    ) as session:
+        yield session
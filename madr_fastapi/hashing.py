@@ -0,0 +1,111 @@
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from http import HTTPStatus
+from threading import Lock
+from time import perf_counter
+
+from fastapi import HTTPException
+
+from madr_fastapi.settings import Settings
+
+settings = Settings()  # type: ignore
+
+
+def _timed_call(fn, *args):
+    start = perf_counter()
+    result = fn(*args)
+
+    return result, perf_counter() - start
+
+
+class HashingExecutor:
+    def __init__(self, mode: str, max_workers: int, queue_limit: int):
+        self.mode = mode
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+
+        self._executor: Executor | None = None
+        self._lock = Lock()
+
+        self.queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.wait_seconds_total = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == 'process':
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix='hashing'
+                )
+
+        return self._executor
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.queue_depth >= self.queue_limit:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                    detail='Server busy, try again later.',
+                    headers={'Retry-After': '1'},
+                )
+            self.queue_depth += 1
+
+        submitted = perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, *args
+            )
+        finally:
+            with self._lock:
+                self.queue_depth -= 1
+
+        with self._lock:
+            self.completed += 1
+            self.hash_seconds_total += elapsed
+            self.hash_seconds_max = max(self.hash_seconds_max, elapsed)
+            self.wait_seconds_total += perf_counter() - submitted - elapsed
+
+        return result
+
+    def metrics(self) -> dict:
+        with self._lock:
+            completed = self.completed or 1
+
+            return {
+                'mode': self.mode,
+                'max_workers': self.max_workers,
+                'queue_limit': self.queue_limit,
+                'queue_depth': self.queue_depth,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'hash_latency_avg_ms': (
+                    self.hash_seconds_total / completed * 1000
+                ),
+                'hash_latency_max_ms': self.hash_seconds_max * 1000,
+                'queue_wait_avg_ms': (
+                    self.wait_seconds_total / completed * 1000
+                ),
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hashing_executor = HashingExecutor(
+    mode=settings.HASH_EXECUTOR_MODE,
+    max_workers=settings.HASH_EXECUTOR_WORKERS,
+    queue_limit=settings.HASH_EXECUTOR_QUEUE_LIMIT,
+)
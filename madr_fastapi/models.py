@@ -1,17 +1,56 @@
-from sqlalchemy import ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
+from datetime import datetime
+
+from sqlalchemy import (
+    DDL,
+    DateTime,
+    ForeignKey,
+    Index,
+    event,
+    func,
+    literal_column,
+)
+from sqlalchemy.orm import (
+    Mapped,
+    Session,
+    mapped_column,
+    registry,
+    relationship,
+)
+from sqlalchemy.sql.elements import BindParameter
+
+from madr_fastapi.utils import sanitize_name
 
 table_registry = registry()
 
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+
+def normalized_key(column: str):
+    def default(context):
+        return sanitize_name(context.get_current_parameters()[column])
+
+    return default
+
+
+def key_column(column: str) -> Mapped[str]:
+    return mapped_column(
+        init=False,
+        unique=True,
+        index=True,
+        insert_default=normalized_key(column),
+    )
+
 
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
-    username: Mapped[str] = mapped_column(unique=True)
+    username: Mapped[str]
+    username_key: Mapped[str] = key_column('username')
     email: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str]
+    token_version: Mapped[int] = mapped_column(init=False, insert_default=0)
 
 
 @table_registry.mapped_as_dataclass
@@ -19,25 +58,152 @@ class Novelist:
     __tablename__ = 'novelists'
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
-    name: Mapped[str] = mapped_column(unique=True)
+    name: Mapped[str]
+    name_key: Mapped[str] = key_column('name')
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        init=False,
+        insert_default=func.now(),
+        onupdate=func.now(),
+        index=True,
+    )
+    version: Mapped[int] = mapped_column(
+        init=False,
+        insert_default=1,
+        onupdate=literal_column('version') + 1,
+    )
 
     books: Mapped[list['Book']] = relationship(
         init=False,
         back_populates='novelist',
         cascade='all, delete-orphan',
-        lazy='selectin',
+        passive_deletes=True,
+        lazy='raise',
     )
 
 
 @table_registry.mapped_as_dataclass
 class Book:
     __tablename__ = 'books'
+    __table_args__ = (
+        Index('ix_books_novelist_id_year', 'novelist_id', 'year'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
-    title: Mapped[str] = mapped_column(unique=True)
-    year: Mapped[int]
-    novelist_id: Mapped[int] = mapped_column(ForeignKey('novelists.id'))
+    title: Mapped[str]
+    title_key: Mapped[str] = key_column('title')
+    year: Mapped[int] = mapped_column(index=True)
+    novelist_id: Mapped[int] = mapped_column(
+        ForeignKey('novelists.id', ondelete='CASCADE')
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        init=False,
+        insert_default=func.now(),
+        onupdate=func.now(),
+        index=True,
+    )
+    version: Mapped[int] = mapped_column(
+        init=False,
+        insert_default=1,
+        onupdate=literal_column('version') + 1,
+    )
 
     novelist: Mapped[Novelist] = relationship(
         init=False, back_populates='books'
     )
+
+
+def search_vector(column):
+    return func.to_tsvector(SEARCH_CONFIG, column)
+
+
+def fts5_statements(table: str, column: str) -> list[str]:
+    fts = f'{table}_fts'
+
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({column}, content='{table}', "
+        "content_rowid='id')",
+        f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); '
+        'END',
+        f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, "
+        f'old.{column}); END',
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, "
+        f'old.{column}); '
+        f'INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); '
+        'END',
+    ]
+
+
+# Search covers the normalised keys so it agrees with the ?title= and
+# ?name= filters on punctuation, case and spacing.
+for model, column in ((Book, 'title_key'), (Novelist, 'name_key')):
+    Index(
+        f'ix_{model.__tablename__}_{column}_search',
+        search_vector(getattr(model, column)),
+        postgresql_using='gin',
+    ).ddl_if(dialect='postgresql')
+
+    for statement in fts5_statements(model.__tablename__, column):
+        event.listen(
+            model.__table__,
+            'after_create',
+            DDL(statement).execute_if(dialect='sqlite'),
+        )
+
+    event.listen(
+        model.__table__,
+        'before_drop',
+        DDL(f'DROP TABLE IF EXISTS {model.__tablename__}_fts').execute_if(
+            dialect='sqlite'
+        ),
+    )
+
+
+# Display columns and the normalised keys derived from them. Inserts fall
+# back to the key column's insert_default; objects and UPDATE statements
+# are handled below, so callers never set a key themselves.
+NORMALIZED_KEYS = {User: 'username', Novelist: 'name', Book: 'title'}
+
+
+def set_normalized_key(column: str):
+    def listener(target, value, oldvalue, initiator):
+        setattr(target, f'{column}_key', sanitize_name(value))
+
+    return listener
+
+
+for model, column in NORMALIZED_KEYS.items():
+    event.listen(getattr(model, column), 'set', set_normalized_key(column))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def normalize_updated_keys(state):
+    if not state.is_update or state.bind_mapper is None:
+        return
+
+    column = NORMALIZED_KEYS.get(state.bind_mapper.class_)
+
+    if column is None:
+        return
+
+    key = f'{column}_key'
+
+    # Bulk UPDATE by primary key: one parameter dict per row.
+    if isinstance(state.parameters, list):
+        for row in state.parameters:
+            if column in row:
+                row[key] = sanitize_name(row[column])
+
+    values = {
+        getattr(target, 'key', target): value
+        for target, value in (state.statement._values or {}).items()
+    }
+
+    if isinstance(values.get(column), BindParameter):
+        state.statement = state.statement.values(
+            {key: sanitize_name(values[column].value)}
+        )
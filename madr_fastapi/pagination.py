@@ -0,0 +1,161 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madr_fastapi.cache import TTLCache
+from madr_fastapi.schemas import PageFilter
+from madr_fastapi.settings import Settings
+
+settings = Settings()  # type: ignore
+
+count_cache = TTLCache(
+    maxsize=settings.COUNT_CACHE_SIZE, ttl=settings.COUNT_CACHE_TTL
+)
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(values, separators=(',', ':')).encode()
+
+    return urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def cursor_value_matches(key, value) -> bool:
+    python_type = key.type.python_type
+
+    # JSON booleans decode as ints; they never belong in a keyset.
+    return isinstance(value, python_type) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: str, *keys) -> list:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(urlsafe_b64decode(padded))
+    except ValueError:
+        values = None
+
+    if (
+        not isinstance(values, list)
+        or len(values) != len(keys)
+        or not all(
+            cursor_value_matches(key, value)
+            for key, value in zip(keys, values)
+        )
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail='Invalid cursor.',
+        )
+
+    return values
+
+
+def page_query(
+    query: Select, page_filter: PageFilter, *keys, seek: bool = True
+) -> Select:
+    query = query.order_by(*keys)
+
+    if page_filter.cursor and not seek:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail='Cursor pagination is not available for this query.',
+        )
+
+    if page_filter.cursor:
+        values = decode_cursor(page_filter.cursor, *keys)
+        if len(keys) == 1:
+            query = query.where(keys[0] > values[0])
+        else:
+            query = query.where(tuple_(*keys) > tuple_(*values))
+    else:
+        query = query.offset((page_filter.page - 1) * page_filter.limit)
+
+    return query.limit(page_filter.limit + 1)
+
+
+async def count_rows(session: AsyncSession, query: Select) -> int:
+    return await session.scalar(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    )
+
+
+async def estimate_rows(session: AsyncSession, query: Select) -> int:
+    dialect = session.bind.dialect
+    compiled = query.order_by(None).compile(dialect=dialect)
+    params = compiled.params
+    if compiled.positiontup is not None:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    key = (dialect.name, str(compiled), repr(params))
+    if (estimate := count_cache.get(key)) is not None:
+        return estimate
+
+    if dialect.name == 'postgresql':
+        connection = await session.connection()
+        result = await connection.exec_driver_sql(
+            f'EXPLAIN (FORMAT JSON) {compiled}', params
+        )
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+    else:
+        # SQLite keeps no row estimates, so count for real and let the
+        # cache absorb the repeated requests.
+        estimate = await count_rows(session, query)
+
+    count_cache.set(key, estimate)
+
+    return estimate
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    page_filter: PageFilter,
+    *keys,
+    seek: bool = True,
+) -> tuple[list, str | None, int | None]:
+    total = None
+    if page_filter.count == 'estimated':
+        total = await estimate_rows(session, query)
+
+    paged = page_query(query, page_filter, *keys, seek=seek)
+
+    if page_filter.count == 'exact':
+        if page_filter.cursor:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail='Exact counts are not available with a cursor.',
+            )
+
+        result = await session.execute(
+            paged.add_columns(func.count().over().label('total'))
+        )
+        rows = result.all()
+
+        if rows:
+            total = rows[0].total
+        elif page_filter.page > 1:
+            # Past the last page the window has no row to report on.
+            total = await count_rows(session, query)
+        else:
+            total = 0
+        rows = [row[0] for row in rows]
+    else:
+        rows = (await session.scalars(paged)).all()
+
+    # One extra row is fetched to learn whether another page exists.
+    has_more = len(rows) > page_filter.limit
+    rows = rows[: page_filter.limit]
+
+    next_cursor = None
+    if has_more and seek and rows:
+        next_cursor = encode_cursor(
+            *(getattr(rows[-1], key.key) for key in keys)
+        )
+
+    return list(rows), next_cursor, total
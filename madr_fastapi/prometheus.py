@@ -0,0 +1,419 @@
+import inspect
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from http import HTTPStatus
+from math import inf
+from threading import Lock
+from time import perf_counter
+
+from fastapi.routing import APIRoute
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+METHODS = frozenset({
+    'GET',
+    'HEAD',
+    'POST',
+    'PUT',
+    'PATCH',
+    'DELETE',
+    'OPTIONS',
+})
+UNMATCHED_ROUTE = '<unmatched>'
+OVERFLOW = '<other>'
+MAX_SERIES = 500
+
+
+def format_value(value: float) -> str:
+    if value == inf:
+        return '+Inf'
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def escape(value: str) -> str:
+    return (
+        value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+    )
+
+
+def format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [
+        f'{name}="{escape(str(value))}"' for name, value in zip(names, values)
+    ]
+
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    type = ''
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        max_series: int = MAX_SERIES,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.max_series = max_series
+
+        self._lock = Lock()
+        self._series: dict[tuple, object] = {}
+
+    def _key(self, labels: tuple) -> tuple:
+        # Unbounded label values (paths, user input) would grow the series
+        # forever; past max_series new combinations share one bucket.
+        if labels in self._series or len(self._series) < self.max_series:
+            return labels
+
+        return (OVERFLOW,) * len(self.labelnames)
+
+    def header(self) -> list[str]:
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._series.get(labels, 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            return self.header() + [
+                f'{self.name}{format_labels(self.labelnames, labels)} '
+                f'{format_value(value)}'
+                for labels, value in sorted(self._series.items())
+            ]
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, *args, buckets=LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = (*buckets, inf)
+
+    def observe(self, value: float, *labels) -> None:
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0]
+
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+
+        return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        names = (*self.labelnames, 'le')
+
+        with self._lock:
+            for labels, (counts, total, count) in sorted(
+                self._series.items()
+            ):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    bucket_labels = format_labels(
+                        names, (*labels, format_value(bound))
+                    )
+                    lines.append(
+                        f'{self.name}_bucket{bucket_labels} {cumulative}'
+                    )
+
+                series_labels = format_labels(self.labelnames, labels)
+                lines.append(
+                    f'{self.name}_sum{series_labels} {format_value(total)}'
+                )
+                lines.append(f'{self.name}_count{series_labels} {count}')
+
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+        self._collectors: list[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+        return metric
+
+    def collector(self, collect: Callable[[], Iterable[Metric]]):
+        self._collectors.append(collect)
+
+        return collect
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for collect in self._collectors:
+            for metric in collect():
+                lines += metric.render()
+
+        return '\n'.join(lines) + '\n'
+
+
+def snapshot_gauge(
+    name: str,
+    documentation: str,
+    samples: dict,
+    labelname: str | None = None,
+    kind: type[Counter] = Gauge,
+) -> Metric:
+    metric = kind(name, documentation, (labelname,) if labelname else ())
+    for label, value in samples.items():
+        metric.inc(*((label,) if labelname else ()), amount=value)
+
+    return metric
+
+
+registry = Registry()
+
+http_requests = registry.register(
+    Counter(
+        'madr_http_requests_total',
+        'HTTP responses by method, route template and status code.',
+        ('method', 'route', 'status'),
+    )
+)
+http_request_duration = registry.register(
+    Histogram(
+        'madr_http_request_duration_seconds',
+        'HTTP request latency by method and route template.',
+        ('method', 'route'),
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge(
+        'madr_http_requests_in_flight',
+        'HTTP requests currently being served.',
+        ('method',),
+    )
+)
+db_queries_per_request = registry.register(
+    Histogram(
+        'madr_db_queries_per_request',
+        'SQL statements executed while serving one request.',
+        ('route',),
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+)
+db_seconds_per_request = registry.register(
+    Histogram(
+        'madr_db_request_query_seconds',
+        'Time spent in SQL statements while serving one request.',
+        ('route',),
+    )
+)
+db_query_duration = registry.register(
+    Histogram(
+        'madr_db_query_duration_seconds',
+        'Latency of individual SQL statements.',
+    )
+)
+
+
+@dataclass
+class RequestStats:
+    count: int = 0
+    seconds: float = 0.0
+    timings: dict[str, float] = field(default_factory=dict)
+    endpoint_done_at: float | None = None
+    scope: dict | None = None
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+
+    def add_timing(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    'request_stats', default=None
+)
+
+
+def record_query(seconds: float) -> None:
+    db_query_duration.observe(seconds)
+
+    if (stats := request_stats.get()) is not None:
+        stats.record(seconds)
+
+
+@contextmanager
+def timing(name: str):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        if (stats := request_stats.get()) is not None:
+            stats.add_timing(name, perf_counter() - start)
+
+
+def timed(name: str):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with timing(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def route_template(scope) -> str:
+    route = scope.get('route')
+
+    return getattr(route, 'path', None) or UNMATCHED_ROUTE
+
+
+def current_route() -> str | None:
+    stats = request_stats.get()
+
+    return route_template(stats.scope) if stats and stats.scope else None
+
+
+def mark_endpoint_done() -> None:
+    if (stats := request_stats.get()) is not None:
+        stats.endpoint_done_at = perf_counter()
+
+
+class TimedRoute(APIRoute):
+    # Marks when the endpoint returns, so the time FastAPI then spends
+    # validating and serialising the response can be told apart.
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+
+            @wraps(endpoint)
+            async def timed_endpoint(*args, **kwargs):
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    mark_endpoint_done()
+
+        else:
+
+            @wraps(endpoint)
+            def timed_endpoint(*args, **kwargs):
+                try:
+                    return endpoint(*args, **kwargs)
+                finally:
+                    mark_endpoint_done()
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+
+def server_timing(stats: RequestStats, total: float) -> str:
+    metrics = [
+        f'db;dur={stats.seconds * 1000:.3f};desc="{stats.count} statements"',
+        f'db-statements;desc="{stats.count}"',
+    ]
+    metrics += [
+        f'{name};dur={seconds * 1000:.3f}'
+        for name, seconds in stats.timings.items()
+    ]
+    metrics.append(f'total;dur={total * 1000:.3f}')
+
+    return ', '.join(metrics)
+
+
+class MetricsMiddleware:
+    def __init__(self, app, settings=None):
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method'] if scope['method'] in METHODS else OVERFLOW
+        status = HTTPStatus.INTERNAL_SERVER_ERROR
+        stats = RequestStats(scope=scope)
+        token = request_stats.set(stats)
+        add_server_timing = bool(
+            self.settings and self.settings.DEBUG_SERVER_TIMING
+        )
+
+        async def send_recording_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if add_server_timing:
+                    now = perf_counter()
+                    if stats.endpoint_done_at is not None:
+                        stats.add_timing(
+                            'serialize', now - stats.endpoint_done_at
+                        )
+                    message['headers'] = [
+                        *message.get('headers', ()),
+                        (
+                            b'server-timing',
+                            server_timing(stats, now - start).encode(),
+                        ),
+                    ]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_recording_status)
+        finally:
+            elapsed = perf_counter() - start
+            route = route_template(scope)
+
+            http_requests_in_flight.dec(method)
+            http_requests.inc(method, route, str(int(status)))
+            http_request_duration.observe(elapsed, method, route)
+            db_queries_per_request.observe(stats.count, route)
+            db_seconds_per_request.observe(stats.seconds, route)
+            request_stats.reset(token)
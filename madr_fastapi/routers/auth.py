@@ -6,14 +6,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from madr_fastapi.database import get_session
 from madr_fastapi.models import User
-from madr_fastapi.schemas import LoginToken
+from madr_fastapi.prometheus import TimedRoute
+from madr_fastapi.schemas import LoginToken, Message
 from madr_fastapi.security import (
     create_access_token,
     get_current_user,
+    revoke_user_tokens,
+    user_token_claims,
 )
 from madr_fastapi.services import authenticate_user
 
-router = APIRouter(prefix='/auth', tags=['auth'])
+router = APIRouter(prefix='/auth', tags=['auth'], route_class=TimedRoute)
 
 OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
@@ -29,13 +32,20 @@ async def login_for_access_token(
         session, form_data.username, form_data.password
     )
 
-    access_token = create_access_token({'sub': user.email})
+    access_token = create_access_token(user_token_claims(user))
 
     return {'token_type': 'Bearer', 'access_token': access_token}
 
 
 @router.post('/refresh_token', response_model=LoginToken)
 async def refresh_access_token(user: CurrentUser):
-    new_access_token = create_access_token({'sub': user.email})
+    new_access_token = create_access_token(user_token_claims(user))
 
     return {'token_type': 'Bearer', 'access_token': new_access_token}
+
+
+@router.post('/logout', response_model=Message)
+async def logout(session: SessionDep, user: CurrentUser):
+    await revoke_user_tokens(session, user)
+
+    return {'message': 'Logged out successfully.'}
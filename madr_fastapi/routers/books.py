@@ -1,13 +1,22 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from madr_fastapi.database import get_session
-from madr_fastapi.models import Book, User
+from madr_fastapi.cache import response_cache
+from madr_fastapi.conditional import Conditional, row_version, weak_etag
+from madr_fastapi.database import get_read_session, get_session
+from madr_fastapi.models import Book, Novelist, User
+from madr_fastapi.pagination import paginate
+from madr_fastapi.prometheus import TimedRoute, timing
 from madr_fastapi.schemas import (
+    BookBulkItem,
+    BookBulkResult,
+    BookBulkUpdate,
+    BookExport,
+    BookExportFilter,
     BookFilter,
     BookList,
     BookPublic,
@@ -17,16 +26,27 @@ from madr_fastapi.schemas import (
 )
 from madr_fastapi.security import get_current_user
 from madr_fastapi.services import (
+    BOOK_CONFLICTS,
+    book_update_status,
+    ensure_bulk_size,
+    execute_many_or_conflict,
+    execute_or_conflict,
+    existing_owners,
+    existing_values,
+    export_query,
+    filter_books,
     get_book_or_return_404,
-    get_novelist_or_return_404,
-    verify_duplicate_book,
+    get_row_or_return_404,
 )
-from madr_fastapi.utils import sanitize_name
+from madr_fastapi.streaming import export_response
+from madr_fastapi.utils import sanitize_name, sanitize_names
 
-router = APIRouter(prefix='/books', tags=['books'])
+router = APIRouter(prefix='/books', tags=['books'], route_class=TimedRoute)
 
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
+ConditionalDep = Annotated[Conditional, Depends()]
 
 
 @router.post(
@@ -35,20 +55,186 @@ CurrentUser = Annotated[User, Depends(get_current_user)]
 async def create_book(
     session: SessionDep, current_user: CurrentUser, book: BookSchema
 ):
-    await get_novelist_or_return_404(session, book.novelist_id)
-    await verify_duplicate_book(session, book)
+    db_book = await execute_or_conflict(
+        session,
+        insert(Book)
+        .values(
+            year=book.year, title=book.title, novelist_id=book.novelist_id
+        )
+        .returning(Book),
+        BOOK_CONFLICTS,
+    )
+    await response_cache.invalidate('books')
+
+    return db_book
+
+
+@router.get('/export', status_code=HTTPStatus.OK)
+async def export_books(
+    session: ReadSessionDep,
+    current_user: CurrentUser,
+    export_filter: Annotated[BookExportFilter, Query()],
+):
+    query = export_query(
+        filter_books(export_filter, session.bind.dialect.name),
+        Book,
+        BookExport,
+        export_filter,
+    )
+
+    return export_response(session, query, export_filter.format, 'books')
+
+
+@router.post('/bulk', response_model=BookBulkResult, status_code=HTTPStatus.OK)
+async def create_books(
+    session: SessionDep, current_user: CurrentUser, books: list[BookSchema]
+):
+    ensure_bulk_size(books)
+
+    title_keys = sanitize_names(book.title for book in books)
+    novelist_ids = await existing_values(
+        session, Novelist.id, {book.novelist_id for book in books}
+    )
+    taken_keys = await existing_values(
+        session, Book.title_key, set(title_keys)
+    )
+
+    items, rows = [], []
+    for book, title_key in zip(books, title_keys):
+        if book.novelist_id not in novelist_ids:
+            status, detail = BOOK_CONFLICTS['novelist_id']
+        elif title_key in taken_keys:
+            status, detail = BOOK_CONFLICTS['title_key']
+        else:
+            status, detail = HTTPStatus.CREATED, None
+            taken_keys.add(title_key)
+            rows.append({
+                'title': book.title,
+                'title_key': title_key,
+                'year': book.year,
+                'novelist_id': book.novelist_id,
+            })
+        items.append(BookBulkItem(status=status, detail=detail))
+
+    if rows:
+        created = iter(
+            await execute_many_or_conflict(
+                session,
+                insert(Book).returning(Book, sort_by_parameter_order=True),
+                rows,
+                BOOK_CONFLICTS,
+            )
+        )
+        for item in items:
+            if item.status == HTTPStatus.CREATED:
+                db_book = next(created)
+                item.id = db_book.id
+                item.book = BookPublic.model_validate(db_book)
+        await response_cache.invalidate('books')
 
-    cleaned_title = sanitize_name(book.title)
+    return {'books': items}
 
-    db_book = Book(
-        year=book.year, title=cleaned_title, novelist_id=book.novelist_id
+
+@router.patch(
+    '/bulk', response_model=BookBulkResult, status_code=HTTPStatus.OK
+)
+async def update_books(
+    session: SessionDep,
+    current_user: CurrentUser,
+    books: list[BookBulkUpdate],
+):
+    ensure_bulk_size(books)
+
+    changes = [
+        book.model_dump(exclude_unset=True, exclude_none=True)
+        for book in books
+    ]
+    book_ids = await existing_values(
+        session, Book.id, {book.id for book in books}
+    )
+    novelist_ids = await existing_values(
+        session,
+        Novelist.id,
+        {
+            values['novelist_id']
+            for values in changes
+            if 'novelist_id' in values
+        },
+    )
+    title_owners = await existing_owners(
+        session,
+        Book.title_key,
+        Book.id,
+        {
+            sanitize_name(values['title'])
+            for values in changes
+            if 'title' in values
+        },
     )
 
-    session.add(db_book)
+    items, rows, seen = [], [], set()
+    for values in changes:
+        status, detail = book_update_status(
+            values, book_ids, novelist_ids, title_owners, seen
+        )
+        if status == HTTPStatus.OK:
+            seen.add(values['id'])
+            if 'title' in values:
+                title_owners[sanitize_name(values['title'])] = values['id']
+            if len(values) > 1:
+                rows.append(values)
+        items.append(
+            BookBulkItem(status=status, detail=detail, id=values['id'])
+        )
+
+    if rows:
+        await execute_many_or_conflict(
+            session, update(Book), rows, BOOK_CONFLICTS
+        )
+        await response_cache.invalidate('books')
+
+    if seen:
+        db_books = await session.scalars(
+            select(Book)
+            .where(Book.id.in_(seen))
+            .execution_options(populate_existing=True)
+        )
+        updated = {db_book.id: db_book for db_book in db_books}
+        for item in items:
+            if item.status == HTTPStatus.OK:
+                item.book = BookPublic.model_validate(updated[item.id])
+
+    return {'books': items}
+
+
+@router.delete(
+    '/bulk', response_model=BookBulkResult, status_code=HTTPStatus.OK
+)
+async def delete_books(
+    session: SessionDep, current_user: CurrentUser, book_ids: list[int]
+):
+    ensure_bulk_size(book_ids)
+
+    deleted = set(
+        await session.scalars(
+            delete(Book).where(Book.id.in_(book_ids)).returning(Book.id)
+        )
+    )
     await session.commit()
-    await session.refresh(db_book)
+    await response_cache.invalidate('books')
 
-    return db_book
+    return {
+        'books': [
+            BookBulkItem(status=HTTPStatus.OK, id=book_id)
+            if book_id in deleted
+            else BookBulkItem(
+                status=HTTPStatus.NOT_FOUND,
+                detail='Book not found.',
+                id=book_id,
+            )
+            for book_id in book_ids
+        ]
+    }
 
 
 @router.delete(
@@ -57,10 +243,17 @@ async def create_book(
 async def delete_book(
     session: SessionDep, current_user: CurrentUser, book_id: int
 ):
-    db_book = await get_book_or_return_404(session, book_id)
+    deleted_id = await session.scalar(
+        delete(Book).where(Book.id == book_id).returning(Book.id)
+    )
+
+    if not deleted_id:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Book not found.'
+        )
 
-    await session.delete(db_book)
     await session.commit()
+    await response_cache.invalidate('books')
 
     return {'message': 'Book deleted successfully.'}
 
@@ -74,20 +267,25 @@ async def update_book(
     book_id: int,
     book: BookUpdate,
 ):
-    db_book = await get_book_or_return_404(session, book_id)
-    if book.novelist_id is not None:
-        await get_novelist_or_return_404(session, book.novelist_id)
-    await verify_duplicate_book(session, book)
-
-    for key, value in book.model_dump(exclude_unset=True).items():
-        new_value = value
-        if key == 'title':
-            new_value = sanitize_name(value)
-        setattr(db_book, key, new_value)
-
-    session.add(db_book)
-    await session.commit()
-    await session.refresh(db_book)
+    values = book.model_dump(exclude_unset=True, exclude_none=True)
+
+    if not values:
+        return await get_book_or_return_404(session, book_id)
+
+    db_book = await execute_or_conflict(
+        session,
+        update(Book)
+        .where(Book.id == book_id)
+        .values(**values)
+        .returning(Book),
+        BOOK_CONFLICTS,
+    )
+    await response_cache.invalidate('books')
+
+    if not db_book:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Book not found.'
+        )
 
     return db_book
 
@@ -96,31 +294,55 @@ async def update_book(
     '/{book_id}', response_model=BookPublic, status_code=HTTPStatus.OK
 )
 async def list_book(
-    session: SessionDep, current_user: CurrentUser, book_id: int
+    session: ReadSessionDep,
+    current_user: CurrentUser,
+    book_id: int,
+    conditional: ConditionalDep,
 ):
-    db_book = await get_book_or_return_404(session, book_id)
+    row = await get_row_or_return_404(
+        session, Book, BookPublic, book_id, 'Book not found.'
+    )
 
-    return db_book
+    etag = weak_etag(row_version(row))
+    if not_modified := conditional.not_modified(etag):
+        return not_modified
+
+    return row._asdict()
 
 
 @router.get('/', response_model=BookList, status_code=HTTPStatus.OK)
 async def list_books(
-    session: SessionDep,
+    session: ReadSessionDep,
     current_user: CurrentUser,
     book_filter: Annotated[BookFilter, Query()],
+    conditional: ConditionalDep,
 ):
-    query = select(Book)
+    cache_key = await response_cache.key('books', book_filter, 'books')
+    read_from = session.info.get('read_from', 'primary')
 
-    if book_filter.title:
-        query = query.filter(Book.title.contains(book_filter.title))
+    if cached := await response_cache.lookup(cache_key, read_from):
+        etag, body = cached
+    else:
+        query = filter_books(book_filter, session.bind.dialect.name)
 
-    if book_filter.year:
-        query = query.filter(Book.year == book_filter.year)
+        db_books, next_cursor, total = await paginate(
+            session, query, book_filter, Book.id, seek=not book_filter.search
+        )
 
-    offset = (book_filter.page - 1) * book_filter.limit
+        etag = weak_etag(
+            next_cursor,
+            total,
+            [row_version(book) for book in db_books],
+        )
+        with timing('serialize'):
+            body = BookList(
+                books=db_books, next_cursor=next_cursor, total=total
+            ).model_dump_json()
+        await response_cache.store(
+            cache_key, etag, body.encode(), 'books', read_from=read_from
+        )
 
-    db_books = await session.scalars(
-        query.offset(offset).limit(book_filter.limit)
-    )
+    if not_modified := conditional.not_modified(etag):
+        return not_modified
 
-    return {'books': db_books.all()}
+    return conditional.json_response(body)
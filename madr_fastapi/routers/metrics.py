@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from madr_fastapi.database import (
+    engine,
+    pool_metrics,
+    replica_router,
+)
+from madr_fastapi.hashing import hashing_executor
+from madr_fastapi.prometheus import (
+    CONTENT_TYPE,
+    Counter,
+    registry,
+    snapshot_gauge,
+)
+from madr_fastapi.security import token_cache
+
+router = APIRouter(prefix='/metrics', tags=['metrics'])
+
+
+@registry.collector
+def collect_runtime_metrics():
+    hashing = hashing_executor.metrics()
+    pool = pool_metrics.snapshot(engine.pool)
+    tokens = token_cache.stats()
+    replicas = replica_router.snapshot()
+
+    return [
+        snapshot_gauge(
+            'madr_hashing_queue_depth',
+            'Password hashes waiting for or running on the executor.',
+            {None: hashing['queue_depth']},
+        ),
+        snapshot_gauge(
+            'madr_hashing_completed_total',
+            'Password hashes and verifications completed.',
+            {None: hashing['completed']},
+            kind=Counter,
+        ),
+        snapshot_gauge(
+            'madr_hashing_rejected_total',
+            'Password hashing requests rejected by the queue limit.',
+            {None: hashing['rejected']},
+            kind=Counter,
+        ),
+        snapshot_gauge(
+            'madr_db_pool_connections',
+            'Primary pool connections by state.',
+            {
+                'in_use': pool['in_use'],
+                'size': pool['size'],
+                'overflow': pool['overflow'],
+            },
+            labelname='state',
+        ),
+        snapshot_gauge(
+            'madr_db_pool_events_total',
+            'Primary pool checkouts, new connections and timeouts.',
+            {
+                'checkout': pool['checkouts'],
+                'connect': pool['connects'],
+                'timeout': pool['timeouts'],
+            },
+            labelname='event',
+            kind=Counter,
+        ),
+        snapshot_gauge(
+            'madr_token_cache_lookups_total',
+            'Decoded token cache lookups by result.',
+            {'hit': tokens['hits'], 'miss': tokens['misses']},
+            labelname='result',
+            kind=Counter,
+        ),
+        snapshot_gauge(
+            'madr_token_cache_size',
+            'Decoded tokens currently cached.',
+            {None: tokens['size']},
+        ),
+        snapshot_gauge(
+            'madr_replica_sessions_in_use',
+            'Read sessions currently open per replica.',
+            dict(enumerate(replicas['in_use'])),
+            labelname='replica',
+        ),
+    ]
+
+
+@router.get('', response_class=PlainTextResponse)
+def read_prometheus_metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
+@router.get('/hashing', status_code=HTTPStatus.OK)
+def read_hashing_metrics():
+    return hashing_executor.metrics()
+
+
+@router.get('/token-cache', status_code=HTTPStatus.OK)
+def read_token_cache_metrics():
+    return token_cache.stats()
+
+
+@router.get('/pool', status_code=HTTPStatus.OK)
+def read_pool_metrics():
+    return pool_metrics.snapshot(engine.pool)
+
+
+@router.get('/replicas', status_code=HTTPStatus.OK)
+def read_replica_metrics():
+    return replica_router.snapshot()
@@ -1,31 +1,63 @@
+import logging
+from functools import partial
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from madr_fastapi.database import get_session
+from madr_fastapi.cache import response_cache
+from madr_fastapi.conditional import Conditional, row_version, weak_etag
+from madr_fastapi.database import get_read_session, get_session
 from madr_fastapi.models import Novelist, User
+from madr_fastapi.pagination import paginate
+from madr_fastapi.prometheus import TimedRoute, timing
 from madr_fastapi.schemas import (
     Message,
+    NovelistBulkResult,
+    NovelistExport,
+    NovelistExportFilter,
     NovelistFilter,
     NovelistList,
     NovelistPublic,
     NovelistSchema,
     NovelistUpdate,
+    NovelistWithBooks,
 )
 from madr_fastapi.security import get_current_user
 from madr_fastapi.services import (
+    NOVELIST_CONFLICTS,
+    delete_novelist_in_chunks,
+    ensure_bulk_size,
+    execute_many_or_conflict,
+    execute_or_conflict,
+    existing_owners,
+    export_query,
+    filter_novelists,
     get_novelist_or_return_404,
-    verify_duplicate_novelist,
+    get_row_or_return_404,
+    insert_or_skip,
+    novelist_book_rows,
+    novelist_load_options,
 )
-from madr_fastapi.utils import sanitize_name
+from madr_fastapi.settings import Settings
+from madr_fastapi.streaming import export_response
+from madr_fastapi.utils import sanitize_names
 
-router = APIRouter(prefix='/novelists', tags=['novelists'])
+settings = Settings()  # type: ignore
+
+logger = logging.getLogger('madr_fastapi.novelists')
+
+router = APIRouter(
+    prefix='/novelists', tags=['novelists'], route_class=TimedRoute
+)
 
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
+ConditionalDep = Annotated[Conditional, Depends()]
 
 
 @router.post(
@@ -34,31 +66,138 @@ CurrentUser = Annotated[User, Depends(get_current_user)]
 async def create_novelist(
     session: SessionDep, current_user: CurrentUser, novelist: NovelistSchema
 ):
-    await verify_duplicate_novelist(session, novelist)
+    db_novelist = await execute_or_conflict(
+        session,
+        insert(Novelist).values(name=novelist.name).returning(Novelist),
+        NOVELIST_CONFLICTS,
+    )
+    await response_cache.invalidate('novelists')
 
-    cleaned_name = sanitize_name(novelist.name)
+    return db_novelist
 
-    db_novelist = Novelist(name=cleaned_name)
 
-    session.add(db_novelist)
-    await session.commit()
-    await session.refresh(db_novelist)
+@router.post(
+    '/bulk', response_model=NovelistBulkResult, status_code=HTTPStatus.OK
+)
+async def create_novelists(
+    session: SessionDep,
+    current_user: CurrentUser,
+    novelists: list[NovelistSchema],
+):
+    ensure_bulk_size(novelists, settings.NOVELIST_BULK_MAX_ITEMS)
+
+    names = {}
+    for novelist, name_key in zip(
+        novelists, sanitize_names(novelist.name for novelist in novelists)
+    ):
+        names.setdefault(name_key, novelist.name)
+
+    existing = await existing_owners(
+        session, Novelist.name_key, Novelist, names
+    )
+
+    new_keys = [name_key for name_key in names if name_key not in existing]
+    created = {}
+    if new_keys:
+        db_novelists = await execute_many_or_conflict(
+            session,
+            insert_or_skip(
+                Novelist, session.bind.dialect.name, 'name_key'
+            ).returning(Novelist),
+            [
+                {'name': names[name_key], 'name_key': name_key}
+                for name_key in new_keys
+            ],
+            NOVELIST_CONFLICTS,
+        )
+        created = {novelist.name_key: novelist for novelist in db_novelists}
+        await response_cache.invalidate('novelists')
+
+        # Rows skipped by ON CONFLICT were inserted concurrently.
+        skipped = [key for key in new_keys if key not in created]
+        existing.update(
+            await existing_owners(
+                session, Novelist.name_key, Novelist, skipped
+            )
+        )
+
+    return {
+        'created': [created[key] for key in names if key in created],
+        'existing': [existing[key] for key in names if key in existing],
+    }
+
+
+@router.get('/export', status_code=HTTPStatus.OK)
+async def export_novelists(
+    session: ReadSessionDep,
+    current_user: CurrentUser,
+    export_filter: Annotated[NovelistExportFilter, Query()],
+):
+    query = export_query(
+        filter_novelists(export_filter, session.bind.dialect.name),
+        Novelist,
+        NovelistExport,
+        export_filter,
+    )
+
+    return export_response(session, query, export_filter.format, 'novelists')
 
-    return db_novelist
+
+async def purge_novelist(bind, novelist_id: int) -> None:
+    # Every committed chunk is already gone from the database, so cached
+    # book lists are dropped as each one lands.
+    try:
+        await delete_novelist_in_chunks(
+            bind,
+            novelist_id,
+            on_commit=partial(response_cache.invalidate, 'books'),
+        )
+    except Exception:
+        logger.exception(
+            'Purging novelist %s failed; it may be left partially deleted.',
+            novelist_id,
+            extra={'novelist_id': novelist_id},
+        )
+        return
+
+    await response_cache.invalidate('novelists', 'books')
 
 
 @router.delete(
     '/{novelist_id}',
     response_model=Message,
     status_code=HTTPStatus.OK,
+    responses={HTTPStatus.ACCEPTED: {'model': Message}},
 )
 async def delete_novelist(
-    session: SessionDep, current_user: CurrentUser, novelist_id: int
+    session: SessionDep,
+    current_user: CurrentUser,
+    novelist_id: int,
+    background_tasks: BackgroundTasks,
+    background: bool = False,
 ):
-    db_novelist = await get_novelist_or_return_404(session, novelist_id)
+    if background:
+        await get_novelist_or_return_404(session, novelist_id)
+        background_tasks.add_task(purge_novelist, session.bind, novelist_id)
+
+        return JSONResponse(
+            {'message': 'Novelist deletion scheduled.'},
+            status_code=HTTPStatus.ACCEPTED,
+        )
+
+    deleted_id = await session.scalar(
+        delete(Novelist)
+        .where(Novelist.id == novelist_id)
+        .returning(Novelist.id)
+    )
+
+    if not deleted_id:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Novelist not found.'
+        )
 
-    await session.delete(db_novelist)
     await session.commit()
+    await response_cache.invalidate('novelists', 'books')
 
     return {'message': 'Novelist deleted in MADR.'}
 
@@ -74,50 +213,109 @@ async def update_novelist(
     novelist_id: int,
     novelist: NovelistUpdate,
 ):
-    db_novelist = await get_novelist_or_return_404(session, novelist_id)
-    await verify_duplicate_novelist(session, novelist)
+    values = novelist.model_dump(exclude_unset=True, exclude_none=True)
 
-    for key, value in novelist.model_dump(exclude_unset=True).items():
-        new_value = value
-        if key == 'name':
-            new_value = sanitize_name(value)
-        setattr(db_novelist, key, new_value)
+    if not values:
+        return await get_novelist_or_return_404(session, novelist_id)
 
-    session.add(db_novelist)
-    await session.commit()
-    await session.refresh(db_novelist)
+    db_novelist = await execute_or_conflict(
+        session,
+        update(Novelist)
+        .where(Novelist.id == novelist_id)
+        .values(**values)
+        .returning(Novelist),
+        NOVELIST_CONFLICTS,
+    )
+    await response_cache.invalidate('novelists')
+
+    if not db_novelist:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Novelist not found.'
+        )
 
     return db_novelist
 
 
 @router.get(
     '/{novelist_id}',
-    response_model=NovelistPublic,
+    response_model=NovelistPublic | NovelistWithBooks,
     status_code=HTTPStatus.OK,
 )
 async def list_novelist(
-    session: SessionDep, current_user: CurrentUser, novelist_id: int
+    session: ReadSessionDep,
+    current_user: CurrentUser,
+    novelist_id: int,
+    conditional: ConditionalDep,
+    include: Literal['books'] | None = None,
 ):
-    db_novelist = await get_novelist_or_return_404(session, novelist_id)
+    row = await get_row_or_return_404(
+        session, Novelist, NovelistPublic, novelist_id, 'Novelist not found.'
+    )
+    novelist = row._asdict()
+    versions = [row_version(row)]
 
-    return db_novelist
+    if include == 'books':
+        books = await novelist_book_rows(session, novelist_id)
+        novelist['books'] = [book._asdict() for book in books]
+        versions.append([row_version(book) for book in books])
+
+    etag = weak_etag(*versions)
+    if not_modified := conditional.not_modified(etag):
+        return not_modified
+
+    return novelist
 
 
 @router.get('/', response_model=NovelistList, status_code=HTTPStatus.OK)
 async def list_novelists(
-    session: SessionDep,
+    session: ReadSessionDep,
     current_user: CurrentUser,
     novelist_filter: Annotated[NovelistFilter, Query()],
+    conditional: ConditionalDep,
 ):
-    query = select(Novelist)
+    tables = ['novelists']
+    if novelist_filter.include == 'books':
+        tables.append('books')
+    cache_key = await response_cache.key(
+        'novelists', novelist_filter, *tables
+    )
+    read_from = session.info.get('read_from', 'primary')
 
-    if novelist_filter.name:
-        query = query.filter(Novelist.name.contains(novelist_filter.name))
+    if cached := await response_cache.lookup(cache_key, read_from):
+        etag, body = cached
+    else:
+        query = filter_novelists(
+            novelist_filter, session.bind.dialect.name
+        ).options(*novelist_load_options(novelist_filter.include))
 
-    offset = (novelist_filter.page - 1) * novelist_filter.limit
+        db_novelists, next_cursor, total = await paginate(
+            session,
+            query,
+            novelist_filter,
+            Novelist.id,
+            seek=not novelist_filter.search,
+        )
 
-    db_novelists = await session.scalars(
-        query.offset(offset).limit(novelist_filter.limit)
-    )
+        versions = [row_version(novelist) for novelist in db_novelists]
+        if novelist_filter.include == 'books':
+            versions += [
+                row_version(book)
+                for novelist in db_novelists
+                for book in novelist.books
+            ]
+
+        etag = weak_etag(
+            next_cursor, novelist_filter.include, total, versions
+        )
+        with timing('serialize'):
+            body = NovelistList(
+                novelists=db_novelists, next_cursor=next_cursor, total=total
+            ).model_dump_json()
+        await response_cache.store(
+            cache_key, etag, body.encode(), *tables, read_from=read_from
+        )
+
+    if not_modified := conditional.not_modified(etag):
+        return not_modified
 
-    return {'novelists': db_novelists.all()}
+    return conditional.json_response(body)
@@ -1,29 +1,43 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from madr_fastapi.database import get_session
+from madr_fastapi.cache import principal_cache
+from madr_fastapi.database import get_read_session, get_session
 from madr_fastapi.models import User
+from madr_fastapi.pagination import decode_cursor, paginate
+from madr_fastapi.prometheus import TimedRoute
 from madr_fastapi.schemas import (
     Message,
+    UserFilter,
     UserList,
     UserPublic,
     UserSchema,
 )
-from madr_fastapi.security import get_current_user, get_password_hash
+from madr_fastapi.security import (
+    get_current_user,
+    get_password_hash_async,
+)
 from madr_fastapi.services import (
+    USER_CONFLICTS,
+    USER_UPDATE_CONFLICTS,
     ensure_user_owner,
-    verify_duplicate_user,
+    execute_or_conflict,
+)
+from madr_fastapi.streaming import (
+    NDJSON_MEDIA_TYPE,
+    schema_columns,
+    stream_ndjson,
 )
-from madr_fastapi.utils import sanitize_name
 
-router = APIRouter(prefix='/users', tags=['users'])
+router = APIRouter(prefix='/users', tags=['users'], route_class=TimedRoute)
 
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
@@ -31,20 +45,18 @@ CurrentUser = Annotated[User, Depends(get_current_user)]
     '/', response_model=UserPublic, status_code=HTTPStatus.CREATED
 )
 async def create_user(session: SessionDep, user: UserSchema):
-    await verify_duplicate_user(session, user)
-
-    cleaned_username = sanitize_name(user.username)
-
-    db_user = User(
-        username=cleaned_username,
-        email=user.email,
-        password=get_password_hash(user.password),
+    db_user = await execute_or_conflict(
+        session,
+        insert(User)
+        .values(
+            username=user.username,
+            email=user.email,
+            password=await get_password_hash_async(user.password),
+        )
+        .returning(User),
+        USER_CONFLICTS,
     )
 
-    session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
-
     return db_user
 
 
@@ -58,6 +70,7 @@ async def delete_user(
 
     await session.delete(current_user)
     await session.commit()
+    await principal_cache.invalidate(current_user.email)
 
     return {'message': 'User deleted successfully.'}
 
@@ -75,24 +88,26 @@ async def update_user(
 ):
     ensure_user_owner(current_user, user_id)
 
-    try:
-        cleaned_username = sanitize_name(user.username)
-
-        current_user.username = cleaned_username
-        current_user.email = user.email
-        current_user.password = get_password_hash(user.password)
-
-        session.add(current_user)
-        await session.commit()
-        await session.refresh(current_user)
-
-        return current_user
-
-    except IntegrityError:
-        raise HTTPException(
-            status_code=HTTPStatus.CONFLICT,
-            detail='Username or Email already exists.',
+    previous_email = current_user.email
+
+    db_user = await execute_or_conflict(
+        session,
+        update(User)
+        .where(User.id == current_user.id)
+        .values(
+            username=user.username,
+            email=user.email,
+            password=await get_password_hash_async(user.password),
+            # The password is rewritten on every update, so every token
+            # issued before it is revoked.
+            token_version=User.token_version + 1,
         )
+        .returning(User),
+        USER_UPDATE_CONFLICTS,
+    )
+    await principal_cache.invalidate(previous_email, db_user.email)
+
+    return db_user
 
 
 @router.get(
@@ -101,7 +116,7 @@ async def update_user(
     status_code=HTTPStatus.OK,
 )
 async def list_user(
-    session: SessionDep, current_user: CurrentUser, user_id: int
+    session: ReadSessionDep, current_user: CurrentUser, user_id: int
 ):
     ensure_user_owner(current_user, user_id)
 
@@ -111,7 +126,22 @@ async def list_user(
 
 
 @router.get('/', response_model=UserList, status_code=HTTPStatus.OK)
-async def list_users(session: SessionDep):
-    users = await session.scalars(select(User))
+async def list_users(
+    session: ReadSessionDep, user_filter: Annotated[UserFilter, Query()]
+):
+    if user_filter.format == 'ndjson':
+        query = select(User).order_by(User.id)
+        if user_filter.cursor:
+            (last_id,) = decode_cursor(user_filter.cursor, User.id)
+            query = query.where(User.id > last_id)
+
+        return StreamingResponse(
+            stream_ndjson(session, schema_columns(query, User, UserPublic)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    db_users, next_cursor, total = await paginate(
+        session, select(User), user_filter, User.id
+    )
 
-    return {'users': users}
+    return {'users': db_users, 'next_cursor': next_cursor, 'total': total}
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
@@ -28,6 +29,8 @@ class UserPublic(BaseModel):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
+    total: int | None = None
 
 
 class NovelistSchema(BaseModel):
@@ -40,21 +43,46 @@ class NovelistPublic(NovelistSchema):
     model_config = ConfigDict(from_attributes=True)
 
 
-class NovelistUpdate(BaseModel):
-    name: str | None = None
+class NovelistBulkResult(BaseModel):
+    created: list[NovelistPublic]
+    existing: list[NovelistPublic]
 
 
-class NovelistList(BaseModel):
-    novelists: list[NovelistPublic]
+class NovelistUpdate(BaseModel):
+    name: str | None = None
 
 
 class PageFilter(BaseModel):
     limit: int = Field(ge=0, default=20)
     page: int = 1
+    cursor: str | None = Field(default=None, max_length=200)
+    count: Literal['exact', 'estimated', 'none'] = 'none'
+
+
+class UserFilter(PageFilter):
+    format: Literal['json', 'ndjson'] = 'json'
+
+
+class ExportFilter(BaseModel):
+    format: Literal['ndjson', 'csv'] = 'ndjson'
+    updated_since: datetime | None = None
 
 
-class NovelistFilter(PageFilter):
+class NovelistCriteria(BaseModel):
     name: str | None = Field(default=None, min_length=1, max_length=80)
+    search: str | None = Field(default=None, min_length=1, max_length=80)
+
+
+class NovelistFilter(PageFilter, NovelistCriteria):
+    include: Literal['books'] | None = None
+
+
+class NovelistExportFilter(ExportFilter, NovelistCriteria):
+    pass
+
+
+class NovelistExport(NovelistPublic):
+    updated_at: datetime
 
 
 class BookSchema(BaseModel):
@@ -71,6 +99,18 @@ class BookPublic(BookSchema):
 
 class BookList(BaseModel):
     books: list[BookPublic]
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+class NovelistWithBooks(NovelistPublic):
+    books: list[BookPublic]
+
+
+class NovelistList(BaseModel):
+    novelists: list[NovelistPublic | NovelistWithBooks]
+    next_cursor: str | None = None
+    total: int | None = None
 
 
 class BookUpdate(BaseModel):
@@ -79,6 +119,34 @@ class BookUpdate(BaseModel):
     novelist_id: int | None = None
 
 
-class BookFilter(PageFilter):
+class BookBulkUpdate(BookUpdate):
+    id: int
+
+
+class BookBulkItem(BaseModel):
+    status: int
+    detail: str | None = None
+    id: int | None = None
+    book: BookPublic | None = None
+
+
+class BookBulkResult(BaseModel):
+    books: list[BookBulkItem]
+
+
+class BookCriteria(BaseModel):
     year: int | None = Field(default=None, ge=1900, le=datetime.now().year)
     title: str | None = Field(default=None, min_length=1, max_length=80)
+    search: str | None = Field(default=None, min_length=1, max_length=80)
+
+
+class BookFilter(PageFilter, BookCriteria):
+    pass
+
+
+class BookExportFilter(ExportFilter, BookCriteria):
+    pass
+
+
+class BookExport(BookPublic):
+    updated_at: datetime
@@ -1,22 +1,34 @@
 from datetime import datetime, timedelta
 from http import HTTPStatus
+from time import time
 from zoneinfo import ZoneInfo
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jwt import DecodeError, ExpiredSignatureError, decode, encode
+from jwt import (
+    DecodeError,
+    ExpiredSignatureError,
+    InvalidTokenError,
+    decode,
+    encode,
+)
 from pwdlib import PasswordHash
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from madr_fastapi.cache import TTLCache, principal_cache
 from madr_fastapi.database import get_session
+from madr_fastapi.hashing import hashing_executor
 from madr_fastapi.models import User
+from madr_fastapi.prometheus import timed
 from madr_fastapi.settings import Settings
 
 settings = Settings()  # type: ignore
 
 pwd_context = PasswordHash.recommended()
 
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl='auth/token', refreshUrl='auth/refresh_token'
 )
@@ -30,6 +42,16 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def get_password_hash_async(password: str):
+    return await hashing_executor.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await hashing_executor.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
 
@@ -46,6 +68,37 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
+def user_token_claims(user: User) -> dict:
+    return {'sub': user.email, 'uid': user.id, 'ver': user.token_version}
+
+
+def decode_access_token(token: str) -> dict:
+    payload = token_cache.get(token)
+
+    if payload is None:
+        payload = decode(
+            token, settings.SECRET_KEY, algorithms=settings.ALGORITHM
+        )
+        expires_at = payload.get('exp')
+        ttl = None if expires_at is None else expires_at - time()
+        token_cache.set(token, payload, ttl)
+
+    return payload
+
+
+async def revoke_user_tokens(session: AsyncSession, user: User) -> None:
+    # Bumping the version invalidates every token issued to the user so
+    # far, on every worker, without keeping a list of revoked tokens.
+    await session.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(token_version=User.token_version + 1)
+    )
+    await session.commit()
+    await principal_cache.invalidate(user.email)
+
+
+@timed('auth')
 async def get_current_user(
     session: AsyncSession = Depends(get_session),
     token: str = Depends(oauth2_scheme),
@@ -57,9 +110,7 @@ async def get_current_user(
     )
 
     try:
-        payload = decode(
-            token, settings.SECRET_KEY, algorithms=settings.ALGORITHM
-        )
+        payload = decode_access_token(token)
         subject_email = payload.get('sub')
 
         if not subject_email:
@@ -71,11 +122,28 @@ async def get_current_user(
     except ExpiredSignatureError:
         raise credentials_exception
 
-    user = await session.scalar(
-        select(User).where(User.email == subject_email)
-    )
+    except InvalidTokenError:
+        raise credentials_exception
+
+    user = await principal_cache.get(subject_email)
+
+    if user:
+        user = await session.merge(user, load=False)
+    else:
+        user = await session.scalar(
+            select(User).where(User.email == subject_email)
+        )
+
+        if not user:
+            raise credentials_exception
+
+        await principal_cache.set(subject_email, user)
 
-    if not user:
+    # Tokens minted before these claims existed carry neither of them.
+    if (payload.get('uid', user.id), payload.get('ver', 0)) != (
+        user.id,
+        user.token_version,
+    ):
         raise credentials_exception
 
     return user
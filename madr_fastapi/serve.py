@@ -0,0 +1,164 @@
+import argparse
+import logging
+import os
+import random
+from math import ceil
+from pathlib import Path
+
+import uvicorn
+from alembic import command
+from alembic.config import Config
+from uvicorn.main import STARTUP_FAILURE
+from uvicorn.supervisors import Multiprocess
+
+from madr_fastapi.settings import Settings
+
+APP = 'madr_fastapi.app:app'
+CGROUP_ROOT = Path('/sys/fs/cgroup')
+
+logger = logging.getLogger('madr_fastapi.serve')
+
+
+def cpu_quota(cgroup_root: Path = CGROUP_ROOT) -> float | None:
+    try:
+        # cgroup v2: "<quota> <period>", or "max <period>" when unlimited.
+        quota, period = (cgroup_root / 'cpu.max').read_text().split()
+        if quota == 'max':
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        quota = int((cgroup_root / 'cpu/cpu.cfs_quota_us').read_text())
+        period = int((cgroup_root / 'cpu/cpu.cfs_period_us').read_text())
+    except (OSError, ValueError):
+        return None
+
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def available_cpus(cgroup_root: Path = CGROUP_ROOT) -> int:
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:  # pragma: no cover
+        cpus = os.cpu_count() or 1
+
+    if quota := cpu_quota(cgroup_root):
+        cpus = min(cpus, ceil(quota))
+
+    return max(cpus, 1)
+
+
+def missing_shared_caches(settings: Settings) -> list[str]:
+    urls = ['PRINCIPAL_CACHE_URL', 'RESPONSE_CACHE_URL']
+    if settings.READ_DATABASE_URLS:
+        urls.append('READ_YOUR_WRITES_URL')
+
+    return [name for name in urls if not getattr(settings, name)]
+
+
+def worker_count(settings: Settings) -> int:
+    workers = settings.SERVER_WORKERS or available_cpus()
+
+    # In-memory caches are per process: an invalidation would only reach
+    # the worker that handled it.
+    if workers > 1 and (missing := missing_shared_caches(settings)):
+        if settings.SERVER_WORKERS:
+            raise SystemExit(
+                f'{workers} workers need shared caches; set '
+                f'{", ".join(missing)} or run a single worker.'
+            )
+
+        logger.warning(
+            'Running a single worker: %s not set.', ', '.join(missing)
+        )
+        return 1
+
+    return workers
+
+
+def uvicorn_options(settings: Settings) -> dict:
+    workers = worker_count(settings)
+
+    return {
+        'host': settings.SERVER_HOST,
+        'port': settings.SERVER_PORT,
+        'workers': workers,
+        'loop': settings.SERVER_LOOP,
+        'http': settings.SERVER_HTTP,
+        'backlog': settings.SERVER_BACKLOG,
+        'timeout_keep_alive': settings.SERVER_KEEP_ALIVE,
+        # Only the multiprocess supervisor respawns a recycled worker; a
+        # single server would just exit at the limit.
+        'limit_max_requests': (
+            (settings.SERVER_MAX_REQUESTS or None) if workers > 1 else None
+        ),
+        'timeout_graceful_shutdown': settings.SERVER_GRACEFUL_TIMEOUT,
+        'forwarded_allow_ips': settings.SERVER_FORWARDED_ALLOW_IPS,
+        'access_log': settings.SERVER_ACCESS_LOG,
+    }
+
+
+def run_migrations(config_file: str) -> None:
+    command.upgrade(Config(config_file), 'head')
+
+
+class JitteredServer(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, max_requests_jitter: int = 0):
+        super().__init__(config)
+        self.max_requests_jitter = max_requests_jitter
+
+    def run(self, sockets=None):
+        # Runs inside each worker process, so every worker (and every
+        # respawn) draws its own limit and they do not recycle together.
+        if self.config.limit_max_requests and self.max_requests_jitter:
+            self.config.limit_max_requests += random.randint(
+                0, self.max_requests_jitter
+            )
+
+        return super().run(sockets)
+
+
+def serve(options: dict, max_requests_jitter: int = 0) -> None:
+    config = uvicorn.Config(APP, **options)
+    server = JitteredServer(config, max_requests_jitter)
+
+    # Same dispatch as uvicorn.run, which has no hook for a custom server.
+    if config.workers > 1:
+        sock = config.bind_socket()
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+        return
+
+    server.run()
+    if not server.started:
+        raise SystemExit(STARTUP_FAILURE)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog='madr-serve', description='Run the MADR API with workers.'
+    )
+    parser.add_argument('--workers', type=int)
+    parser.add_argument(
+        '--no-migrate',
+        action='store_true',
+        help='skip alembic upgrade head before the workers start',
+    )
+    args = parser.parse_args(argv)
+
+    settings = Settings()  # type: ignore
+    if args.workers:
+        settings.SERVER_WORKERS = args.workers
+
+    # The supervisor migrates once, before uvicorn forks any worker, and
+    # only hands the import string down so each worker builds its own
+    # engine and pool.
+    if settings.SERVER_MIGRATE and not args.no_migrate:
+        run_migrations(settings.SERVER_ALEMBIC_CONFIG)
+
+    serve(uvicorn_options(settings), settings.SERVER_MAX_REQUESTS_JITTER)
+
+
+if __name__ == '__main__':
+    main()
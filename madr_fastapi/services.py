@@ -1,34 +1,202 @@
+from collections.abc import Awaitable, Callable, Iterator
 from http import HTTPStatus
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from pydantic import BaseModel
+from sqlalchemy import (
+    Insert,
+    Row,
+    Select,
+    delete,
+    false,
+    func,
+    insert,
+    literal_column,
+    select,
+    table,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from madr_fastapi.models import Book, Novelist, User
-from madr_fastapi.security import verify_password
+from madr_fastapi.models import (
+    SEARCH_CONFIG,
+    Book,
+    Novelist,
+    User,
+    search_vector,
+)
+from madr_fastapi.prometheus import timed
+from madr_fastapi.schemas import (
+    BookCriteria,
+    BookPublic,
+    ExportFilter,
+    NovelistCriteria,
+)
+from madr_fastapi.security import verify_password_async
+from madr_fastapi.settings import Settings
+from madr_fastapi.streaming import schema_columns
 from madr_fastapi.utils import sanitize_name
 
+settings = Settings()  # type: ignore
 
-async def verify_duplicate_user(session: AsyncSession, user) -> None:
-    cleaned_username = sanitize_name(user.username)
+USER_CONFLICTS = {
+    'username_key': (HTTPStatus.CONFLICT, 'Username already exists.'),
+    'email': (HTTPStatus.CONFLICT, 'Email already exists.'),
+}
 
-    db_user = await session.scalar(
-        select(User).where(
-            (User.username == cleaned_username) | (User.email == user.email)
+USER_UPDATE_CONFLICTS = {
+    'username_key': (
+        HTTPStatus.CONFLICT,
+        'Username or Email already exists.',
+    ),
+    'email': (HTTPStatus.CONFLICT, 'Username or Email already exists.'),
+}
+
+NOVELIST_CONFLICTS = {
+    'name_key': (HTTPStatus.CONFLICT, 'Name already exists.'),
+}
+
+BOOK_CONFLICTS = {
+    'title_key': (HTTPStatus.CONFLICT, 'Title already exists.'),
+    'novelist_id': (HTTPStatus.NOT_FOUND, 'Novelist not found.'),
+}
+
+
+# PostgreSQL names the violated constraint or unique index; its message
+# also quotes the offending values, which may contain any column name.
+CONSTRAINT_COLUMNS = {
+    'ix_users_username_key': 'username_key',
+    'users_email_key': 'email',
+    'ix_novelists_name_key': 'name_key',
+    'ix_books_title_key': 'title_key',
+    'books_novelist_id_fkey': 'novelist_id',
+}
+
+
+def integrity_error_to_http(
+    error: IntegrityError, conflicts: dict
+) -> HTTPException:
+    diag = getattr(error.orig, 'diag', None)
+
+    if diag is not None:
+        column = CONSTRAINT_COLUMNS.get(diag.constraint_name)
+    else:
+        # SQLite reports "table.column", but names no column for foreign
+        # keys, so the last entry is the fallback.
+        message = str(error.orig)
+        column = next(
+            (column for column in conflicts if f'.{column}' in message),
+            None,
         )
+
+    status_code, detail = conflicts.get(
+        column, list(conflicts.values())[-1]
     )
 
-    if db_user:
-        if db_user.username == cleaned_username:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='Username already exists.',
-            )
-        elif db_user.email == user.email:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='Email already exists.',
-            )
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+async def execute_or_conflict(session: AsyncSession, statement, conflicts):
+    try:
+        db_object = await session.scalar(statement)
+        await session.commit()
+    except IntegrityError as error:
+        await session.rollback()
+        raise integrity_error_to_http(error, conflicts)
+
+    return db_object
+
+
+async def execute_many_or_conflict(
+    session: AsyncSession, statement, rows: list[dict], conflicts
+) -> list:
+    try:
+        result = await session.execute(statement, rows)
+        db_objects = result.scalars().all() if result.keys() else []
+        await session.commit()
+    except IntegrityError as error:
+        await session.rollback()
+        raise integrity_error_to_http(error, conflicts)
+
+    return list(db_objects)
+
+
+def ensure_bulk_size(items: list, limit: int | None = None) -> None:
+    limit = limit or settings.BULK_MAX_ITEMS
+
+    if not items or len(items) > limit:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=f'Bulk requests take between 1 and {limit} items.',
+        )
+
+
+def chunked(values, size: int) -> Iterator[list]:
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+async def existing_values(session: AsyncSession, column, values) -> set:
+    found = set()
+    for chunk in chunked(values, settings.BULK_CHUNK_SIZE):
+        found.update(
+            await session.scalars(select(column).where(column.in_(chunk)))
+        )
+
+    return found
+
+
+async def existing_owners(
+    session: AsyncSession, column, key, values
+) -> dict:
+    owners = {}
+    for chunk in chunked(values, settings.BULK_CHUNK_SIZE):
+        result = await session.execute(
+            select(column, key).where(column.in_(chunk))
+        )
+        owners.update(result.tuples().all())
+
+    return owners
+
+
+def insert_or_skip(model, dialect: str, *index_elements: str) -> Insert:
+    if dialect == 'postgresql':
+        return postgresql.insert(model).on_conflict_do_nothing(
+            index_elements=index_elements
+        )
+
+    if dialect == 'sqlite':
+        return sqlite.insert(model).on_conflict_do_nothing(
+            index_elements=index_elements
+        )
+
+    return insert(model)
+
+
+def book_update_status(
+    values: dict,
+    book_ids: set,
+    novelist_ids: set,
+    title_owners: dict,
+    seen: set,
+) -> tuple[int, str | None]:
+    if values['id'] not in book_ids:
+        return HTTPStatus.NOT_FOUND, 'Book not found.'
+
+    if values['id'] in seen:
+        return HTTPStatus.CONFLICT, 'Book appears more than once.'
+
+    if 'novelist_id' in values and values['novelist_id'] not in novelist_ids:
+        return BOOK_CONFLICTS['novelist_id']
+
+    title_key = sanitize_name(values.get('title'))
+    if title_owners.get(title_key, values['id']) != values['id']:
+        return BOOK_CONFLICTS['title_key']
+
+    return HTTPStatus.OK, None
 
 
 def ensure_user_owner(current_user: User, user_id: int) -> None:
@@ -39,12 +207,13 @@ def ensure_user_owner(current_user: User, user_id: int) -> None:
         )
 
 
+@timed('auth')
 async def authenticate_user(
     session: AsyncSession, email: str, password: str
 ) -> User:
     user = await session.scalar(select(User).where(User.email == email))
 
-    if not user or not verify_password(password, user.password):
+    if not user or not await verify_password_async(password, user.password):
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Incorrect email or password.',
@@ -53,26 +222,46 @@ async def authenticate_user(
     return user
 
 
-async def verify_duplicate_novelist(session: AsyncSession, novelist) -> None:
-    cleaned_name = sanitize_name(novelist.name)
-
-    db_novelist = await session.scalar(
-        select(Novelist).where((Novelist.name == cleaned_name))
+async def delete_novelist_in_chunks(
+    bind,
+    novelist_id: int,
+    chunk_size: int | None = None,
+    on_commit: Callable[[], Awaitable] | None = None,
+) -> None:
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    chunk = (
+        select(Book.id)
+        .where(Book.novelist_id == novelist_id)
+        .limit(chunk_size)
+        .scalar_subquery()
     )
 
-    if db_novelist:
-        if db_novelist.name == cleaned_name:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='Name already exists.',
+    # One short transaction per chunk keeps locks and WAL bursts small;
+    # the final novelist delete finds nothing left to cascade.
+    async with AsyncSession(bind) as session:
+        while True:
+            result = await session.execute(
+                delete(Book).where(Book.id.in_(chunk)),
+                execution_options={'synchronize_session': False},
             )
+            await session.commit()
+            if on_commit is not None:
+                await on_commit()
+            if result.rowcount < chunk_size:
+                break
+
+        await session.execute(
+            delete(Novelist).where(Novelist.id == novelist_id),
+            execution_options={'synchronize_session': False},
+        )
+        await session.commit()
 
 
 async def get_novelist_or_return_404(
-    session: AsyncSession, novelist_id: int
+    session: AsyncSession, novelist_id: int, *options
 ) -> Novelist:
     db_novelist = await session.scalar(
-        select(Novelist).where(Novelist.id == novelist_id)
+        select(Novelist).where(Novelist.id == novelist_id).options(*options)
     )
 
     if not db_novelist:
@@ -83,19 +272,45 @@ async def get_novelist_or_return_404(
     return db_novelist
 
 
-async def verify_duplicate_book(session: AsyncSession, book) -> None:
-    cleaned_title = sanitize_name(book.title)
+def novelist_load_options(include: str | None) -> list:
+    if include == 'books':
+        return [selectinload(Novelist.books)]
+
+    return []
+
+
+async def get_row_or_return_404(
+    session: AsyncSession,
+    model,
+    schema: type[BaseModel],
+    row_id: int,
+    detail: str,
+) -> Row:
+    row = (
+        await session.execute(
+            schema_columns(select(model), model, schema)
+            .add_columns(model.version, model.updated_at)
+            .where(model.id == row_id)
+        )
+    ).first()
+
+    if row is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=detail)
+
+    return row
 
-    db_book = await session.scalar(
-        select(Book).where((Book.title == cleaned_title))
+
+async def novelist_book_rows(
+    session: AsyncSession, novelist_id: int
+) -> list[Row]:
+    result = await session.execute(
+        schema_columns(select(Book), Book, BookPublic)
+        .add_columns(Book.version, Book.updated_at)
+        .where(Book.novelist_id == novelist_id)
+        .order_by(Book.id)
     )
 
-    if db_book:
-        if db_book.title == cleaned_title:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='Title already exists.',
-            )
+    return list(result.all())
 
 
 async def get_book_or_return_404(session: AsyncSession, book_id: int) -> Book:
@@ -107,3 +322,80 @@ async def get_book_or_return_404(session: AsyncSession, book_id: int) -> Book:
         )
 
     return db_book
+
+
+def apply_search(
+    query: Select, model, column_name: str, term: str, dialect: str
+) -> Select:
+    column = getattr(model, f'{column_name}_key')
+    words = sanitize_name(term).split()
+
+    if not words:
+        return query.where(false())
+
+    if dialect == 'postgresql':
+        vector = search_vector(column)
+        tsquery = func.to_tsquery(
+            SEARCH_CONFIG, ' & '.join(f'{word}:*' for word in words)
+        )
+
+        return query.where(vector.op('@@')(tsquery)).order_by(
+            func.ts_rank(vector, tsquery).desc()
+        )
+
+    if dialect == 'sqlite':
+        fts_name = f'{model.__tablename__}_fts'
+        fts = table(fts_name, literal_column('rowid'))
+        match = ' '.join(f'"{word}"*' for word in words)
+
+        return (
+            query.join(fts, fts.c.rowid == model.id)
+            .where(literal_column(fts_name).op('MATCH')(match))
+            .order_by(func.bm25(literal_column(fts_name)))
+        )
+
+    return query.where(column.contains(' '.join(words)))
+
+
+def filter_books(book_filter: BookCriteria, dialect: str) -> Select:
+    query = select(Book)
+
+    if book_filter.title:
+        query = query.filter(
+            Book.title_key.contains(sanitize_name(book_filter.title))
+        )
+
+    if book_filter.year:
+        query = query.filter(Book.year == book_filter.year)
+
+    if book_filter.search:
+        query = apply_search(query, Book, 'title', book_filter.search, dialect)
+
+    return query
+
+
+def filter_novelists(
+    novelist_filter: NovelistCriteria, dialect: str
+) -> Select:
+    query = select(Novelist)
+
+    if novelist_filter.name:
+        query = query.filter(
+            Novelist.name_key.contains(sanitize_name(novelist_filter.name))
+        )
+
+    if novelist_filter.search:
+        query = apply_search(
+            query, Novelist, 'name', novelist_filter.search, dialect
+        )
+
+    return query
+
+
+def export_query(
+    query: Select, model, schema: type[BaseModel], export_filter: ExportFilter
+) -> Select:
+    if export_filter.updated_since:
+        query = query.where(model.updated_at >= export_filter.updated_since)
+
+    return schema_columns(query, model, schema).order_by(model.id)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,3 +12,59 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    HASH_EXECUTOR_MODE: Literal['thread', 'process'] = 'thread'
+    HASH_EXECUTOR_WORKERS: int = 4
+    HASH_EXECUTOR_QUEUE_LIMIT: int = 64
+
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    PRINCIPAL_CACHE_TTL: float = 60
+    PRINCIPAL_CACHE_URL: str | None = None
+
+    TOKEN_CACHE_SIZE: int = 4096
+    TOKEN_CACHE_TTL: float = 300
+
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = False
+    DATABASE_PGBOUNCER: bool = False
+
+    READ_DATABASE_URLS: list[str] = []
+    READ_REPLICA_STRATEGY: Literal['round_robin', 'least_connections'] = (
+        'round_robin'
+    )
+    READ_YOUR_WRITES_SECONDS: float = 5
+    READ_YOUR_WRITES_URL: str | None = None
+
+    BULK_MAX_ITEMS: int = 1000
+    BULK_CHUNK_SIZE: int = 1000
+    NOVELIST_BULK_MAX_ITEMS: int = 50_000
+
+    HTTP_CACHE_MAX_AGE: int = 0
+
+    RESPONSE_CACHE_SIZE: int = 512
+    RESPONSE_CACHE_TTL: float = 30
+    RESPONSE_CACHE_URL: str | None = None
+
+    COUNT_CACHE_SIZE: int = 1024
+    COUNT_CACHE_TTL: float = 60
+
+    DEBUG_SERVER_TIMING: bool = False
+    SLOW_QUERY_MS: float | None = None
+
+    SERVER_HOST: str = '0.0.0.0'
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_LOOP: Literal['auto', 'asyncio', 'uvloop'] = 'uvloop'
+    SERVER_HTTP: Literal['auto', 'h11', 'httptools'] = 'httptools'
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE: int = 75
+    SERVER_MAX_REQUESTS: int = 10_000
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_FORWARDED_ALLOW_IPS: str = '127.0.0.1'
+    SERVER_ACCESS_LOG: bool = True
+    SERVER_MIGRATE: bool = True
+    SERVER_ALEMBIC_CONFIG: str = 'alembic.ini'
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+CSV_MEDIA_TYPE = 'text/csv'
+
+
+def schema_columns(query: Select, model, schema: type[BaseModel]) -> Select:
+    return query.with_only_columns(
+        *(getattr(model, name) for name in schema.model_fields)
+    )
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+async def stream_ndjson(
+    session: AsyncSession, query: Select, batch_size: int = 500
+) -> AsyncIterator[str]:
+    result = await session.stream(
+        query.execution_options(yield_per=batch_size)
+    )
+
+    async for rows in result.partitions():
+        yield ''.join([
+            json.dumps(
+                row._asdict(), separators=(',', ':'), default=_isoformat
+            )
+            + '\n'
+            for row in rows
+        ])
+
+
+async def stream_csv(
+    session: AsyncSession, query: Select, batch_size: int = 500
+) -> AsyncIterator[str]:
+    result = await session.stream(
+        query.execution_options(yield_per=batch_size)
+    )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(result.keys())
+
+    async for rows in result.partitions():
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(
+    session: AsyncSession, query: Select, export_format: str, filename: str
+) -> StreamingResponse:
+    if export_format == 'csv':
+        return StreamingResponse(
+            stream_csv(session, query),
+            media_type=CSV_MEDIA_TYPE,
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}.csv"'
+            },
+        )
+
+    return StreamingResponse(
+        stream_ndjson(session, query), media_type=NDJSON_MEDIA_TYPE
+    )
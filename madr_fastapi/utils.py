@@ -1,24 +1,72 @@
 import unicodedata
+from collections.abc import Iterable
+from functools import lru_cache
 
+SANITIZE_CACHE_SIZE = 8192
 
-def sanitize_name(name: str) -> str:  # pragma: no cover
+
+class _SanitizeTable(dict):
+    # str.translate() table resolved lazily per code point: whitespace
+    # becomes a space, letters (L*) and numbers (N*) are kept and
+    # everything else is dropped.
+    def __missing__(self, code: int):
+        char = chr(code)
+
+        if char.isspace():
+            value = ' '
+        elif unicodedata.category(char)[0] in {'L', 'N'}:
+            value = char
+        else:
+            value = None
+
+        self[code] = value
+
+        return value
+
+
+_UNICODE_TABLE = _SanitizeTable()
+
+# ASCII is already NFKC-normalised, so the table can lowercase as well.
+_ASCII_TABLE = {
+    code: _UNICODE_TABLE[code] and _UNICODE_TABLE[code].lower()
+    for code in range(128)
+}
+
+_BATCH_SEPARATOR = '\0'
+_ASCII_BATCH_TABLE = {**_ASCII_TABLE, ord(_BATCH_SEPARATOR): _BATCH_SEPARATOR}
+
+
+@lru_cache(maxsize=SANITIZE_CACHE_SIZE)
+def sanitize_name_cached(name: str) -> str:
+    if name.isascii():
+        return ' '.join(name.translate(_ASCII_TABLE).split())
+
+    # Normalize to composed form to keep accented characters
+    normalized = unicodedata.normalize('NFKC', name)
+
+    return ' '.join(normalized.translate(_UNICODE_TABLE).split()).lower()
+
+
+def sanitize_name(name: str) -> str:
     if not isinstance(name, str):
         return name
 
-    # Normalize to composed form to keep accented characters
-    s = unicodedata.normalize('NFKC', name)
+    return sanitize_name_cached(name)
 
-    # Convert any whitespace to simple space
-    s = ''.join(ch if not ch.isspace() else ' ' for ch in s)
 
-    # Keep letters (L*), numbers (N*), and spaces only
-    cleaned = ''.join(
-        ch
-        for ch in s
-        if unicodedata.category(ch)[0] in {'L', 'N'} or ch == ' '
-    )
+def sanitize_names(names: Iterable[str]) -> list[str]:
+    names = list(names)
 
-    # Collapse multiple spaces and trim
-    cleaned = ' '.join(cleaned.split())
+    if names and all(
+        isinstance(name, str) and name.isascii() for name in names
+    ):
+        joined = _BATCH_SEPARATOR.join(names)
+        if joined.count(_BATCH_SEPARATOR) == len(names) - 1:
+            return [
+                ' '.join(part.split())
+                for part in joined.translate(_ASCII_BATCH_TABLE).split(
+                    _BATCH_SEPARATOR
+                )
+            ]
 
-    return cleaned.lower()
+    return [sanitize_name(name) for name in names]
@@ -0,0 +1,68 @@
+"""add full-text search indexes for book titles and novelist names
+
+Revision ID: 3f1c7a9d2b6e
+Revises: 86c9b511087f
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c7a9d2b6e'
+down_revision: Union[str, Sequence[str], None] = '86c9b511087f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = (('books', 'title'), ('novelists', 'name'))
+
+
+def fts5_statements(table: str, column: str) -> list[str]:
+    fts = f'{table}_fts'
+
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({column}, content='{table}', "
+        "content_rowid='id')",
+        f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); '
+        'END',
+        f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, "
+        f'old.{column}); END',
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, "
+        f'old.{column}); '
+        f'INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); '
+        'END',
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    for table, column in SEARCH_COLUMNS:
+        if dialect == 'postgresql':
+            op.execute(
+                f'CREATE INDEX ix_{table}_{column}_search ON {table} '
+                f"USING gin (to_tsvector('simple'::regconfig, {column}))"
+            )
+        elif dialect == 'sqlite':
+            for statement in fts5_statements(table, column):
+                op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    for table, column in SEARCH_COLUMNS:
+        if dialect == 'postgresql':
+            op.execute(f'DROP INDEX ix_{table}_{column}_search')
+        elif dialect == 'sqlite':
+            for trigger in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER {table}_fts_{trigger}')
+            op.execute(f'DROP TABLE {table}_fts')
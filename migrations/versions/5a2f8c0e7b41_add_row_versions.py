@@ -0,0 +1,37 @@
+"""add version counters to books and novelists
+
+Revision ID: 5a2f8c0e7b41
+Revises: e4a9b37c1d02
+Create Date: 2026-10-18 15:40:12.903518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a2f8c0e7b41'
+down_revision: Union[str, Sequence[str], None] = 'e4a9b37c1d02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('books', 'novelists')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                'version', sa.Integer(), server_default='1', nullable=False
+            ),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_column(table, 'version')
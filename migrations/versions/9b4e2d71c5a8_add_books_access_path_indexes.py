@@ -0,0 +1,34 @@
+"""add books year and novelist indexes
+
+Revision ID: 9b4e2d71c5a8
+Revises: 3f1c7a9d2b6e
+Create Date: 2026-10-18 10:03:47.815204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4e2d71c5a8'
+down_revision: Union[str, Sequence[str], None] = '3f1c7a9d2b6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_year', 'books', ['year'], unique=False)
+    op.create_index(
+        'ix_books_novelist_id_year',
+        'books',
+        ['novelist_id', 'year'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_novelist_id_year', table_name='books')
+    op.drop_index('ix_books_year', table_name='books')
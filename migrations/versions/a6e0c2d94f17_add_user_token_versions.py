@@ -0,0 +1,33 @@
+"""add token version counters to users
+
+Revision ID: a6e0c2d94f17
+Revises: d3c6a1f0e8b2
+Create Date: 2026-10-18 21:12:47.316204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e0c2d94f17'
+down_revision: Union[str, Sequence[str], None] = 'd3c6a1f0e8b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column(
+            'token_version', sa.Integer(), server_default='0', nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
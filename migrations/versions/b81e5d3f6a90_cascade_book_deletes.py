@@ -0,0 +1,77 @@
+"""cascade book deletes from novelists at the database level
+
+Revision ID: b81e5d3f6a90
+Revises: 5a2f8c0e7b41
+Create Date: 2026-10-18 17:05:44.218903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e5d3f6a90'
+down_revision: Union[str, Sequence[str], None] = '5a2f8c0e7b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FOREIGN_KEY = 'books_novelist_id_fkey'
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+
+def fts5_triggers(table: str, column: str) -> list[str]:
+    fts = f'{table}_fts'
+
+    return [
+        f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); '
+        'END',
+        f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, "
+        f'old.{column}); END',
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, "
+        f'old.{column}); '
+        f'INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); '
+        'END',
+    ]
+
+
+def replace_foreign_key(ondelete: str | None) -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_constraint(FOREIGN_KEY, 'books', type_='foreignkey')
+        op.create_foreign_key(
+            FOREIGN_KEY,
+            'books',
+            'novelists',
+            ['novelist_id'],
+            ['id'],
+            ondelete=ondelete,
+        )
+        return
+
+    # SQLite cannot alter a foreign key in place: the table is rebuilt,
+    # which drops the FTS5 triggers, so they are created again. The row
+    # ids are copied over, so the external content index stays valid.
+    with op.batch_alter_table(
+        'books', recreate='always', naming_convention=NAMING_CONVENTION
+    ) as batch:
+        batch.drop_constraint(FOREIGN_KEY, type_='foreignkey')
+        batch.create_foreign_key(
+            FOREIGN_KEY, 'novelists', ['novelist_id'], ['id'],
+            ondelete=ondelete,
+        )
+
+    for statement in fts5_triggers('books', 'title'):
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    replace_foreign_key('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    replace_foreign_key(None)
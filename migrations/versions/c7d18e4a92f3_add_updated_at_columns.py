@@ -0,0 +1,57 @@
+"""add updated_at to books and novelists
+
+Revision ID: c7d18e4a92f3
+Revises: 9b4e2d71c5a8
+Create Date: 2026-10-18 11:12:05.431087
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d18e4a92f3'
+down_revision: Union[str, Sequence[str], None] = '9b4e2d71c5a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('books', 'novelists')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    for table in TABLES:
+        if sqlite:
+            # SQLite cannot add a column with a non-constant default, so
+            # existing rows are backfilled with an explicit UPDATE.
+            op.add_column(
+                table,
+                sa.Column('updated_at', sa.DateTime(timezone=True)),
+            )
+            op.execute(f'UPDATE {table} SET updated_at = CURRENT_TIMESTAMP')
+        else:
+            op.add_column(
+                table,
+                sa.Column(
+                    'updated_at',
+                    sa.DateTime(timezone=True),
+                    server_default=sa.func.now(),
+                    nullable=False,
+                ),
+            )
+            op.alter_column(table, 'updated_at', server_default=None)
+
+        op.create_index(
+            f'ix_{table}_updated_at', table, ['updated_at'], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+        op.drop_column(table, 'updated_at')
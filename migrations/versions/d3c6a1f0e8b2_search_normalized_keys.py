@@ -0,0 +1,70 @@
+"""search the normalized key columns instead of the display columns
+
+Revision ID: d3c6a1f0e8b2
+Revises: b81e5d3f6a90
+Create Date: 2026-10-19 10:21:07.513284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3c6a1f0e8b2'
+down_revision: Union[str, Sequence[str], None] = 'b81e5d3f6a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TABLES = (('books', 'title'), ('novelists', 'name'))
+
+
+def fts5_statements(table: str, column: str) -> list[str]:
+    fts = f'{table}_fts'
+
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({column}, content='{table}', "
+        "content_rowid='id')",
+        f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); '
+        'END',
+        f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, "
+        f'old.{column}); END',
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, "
+        f'old.{column}); '
+        f'INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); '
+        'END',
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def replace_search_index(table: str, old: str, new: str) -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute(f'DROP INDEX ix_{table}_{old}_search')
+        op.execute(
+            f'CREATE INDEX ix_{table}_{new}_search ON {table} '
+            f"USING gin (to_tsvector('simple'::regconfig, {new}))"
+        )
+    elif dialect == 'sqlite':
+        for trigger in ('ai', 'ad', 'au'):
+            op.execute(f'DROP TRIGGER {table}_fts_{trigger}')
+        op.execute(f'DROP TABLE {table}_fts')
+
+        for statement in fts5_statements(table, new):
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in SEARCH_TABLES:
+        replace_search_index(table, column, f'{column}_key')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in SEARCH_TABLES:
+        replace_search_index(table, f'{column}_key', column)
@@ -0,0 +1,85 @@
+"""add normalized key columns for titles, names and usernames
+
+Revision ID: e4a9b37c1d02
+Revises: c7d18e4a92f3
+Create Date: 2026-10-18 14:26:40.118392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from madr_fastapi.utils import sanitize_name
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9b37c1d02'
+down_revision: Union[str, Sequence[str], None] = 'c7d18e4a92f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KEY_COLUMNS = (('books', 'title'), ('novelists', 'name'), ('users', 'username'))
+BATCH_SIZE = 1000
+
+
+def backfill(table_name: str, column: str) -> None:
+    key = f'{column}_key'
+    table = sa.table(
+        table_name, sa.column('id'), sa.column(column), sa.column(key)
+    )
+    bind = op.get_bind()
+    select = (
+        sa.select(table.c.id, table.c[column])
+        .where(table.c[key].is_(None))
+        .order_by(table.c.id)
+        .limit(BATCH_SIZE)
+    )
+    update = (
+        table.update()
+        .where(table.c.id == sa.bindparam('row_id'))
+        .values({key: sa.bindparam('row_key')})
+    )
+
+    while rows := bind.execute(select).all():
+        bind.execute(
+            update,
+            [
+                {'row_id': row_id, 'row_key': sanitize_name(value)}
+                for row_id, value in rows
+            ],
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    for table, column in KEY_COLUMNS:
+        key = f'{column}_key'
+        op.add_column(table, sa.Column(key, sa.String()))
+        backfill(table, column)
+
+        # SQLite cannot alter columns or drop the unnamed UNIQUE constraint
+        # in place, so its key stays nullable and the old constraint stays.
+        if not sqlite:
+            op.alter_column(table, key, nullable=False)
+            op.drop_constraint(f'{table}_{column}_key', table, type_='unique')
+
+        op.create_index(f'ix_{table}_{key}', table, [key], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    for table, column in KEY_COLUMNS:
+        key = f'{column}_key'
+        op.drop_index(f'ix_{table}_{key}', table_name=table)
+
+        if not sqlite:
+            op.create_unique_constraint(
+                f'{table}_{column}_key', table, [column]
+            )
+
+        op.drop_column(table, key)
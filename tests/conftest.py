@@ -3,13 +3,20 @@ import pytest
 import pytest_asyncio
 from faker import Faker
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
 from madr_fastapi.app import app
-from madr_fastapi.database import get_session
+from madr_fastapi.cache import principal_cache, response_cache
+from madr_fastapi.database import (
+    get_read_session,
+    get_session,
+    instrument_queries,
+)
 from madr_fastapi.models import Book, Novelist, User, table_registry
-from madr_fastapi.security import get_password_hash
+from madr_fastapi.pagination import count_cache
+from madr_fastapi.security import get_password_hash, token_cache
 from madr_fastapi.settings import Settings
 from madr_fastapi.utils import sanitize_name
 
@@ -21,6 +28,7 @@ def client(session):
 
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_overrides
+        app.dependency_overrides[get_read_session] = get_session_overrides
         yield client
 
     app.dependency_overrides.clear()
@@ -30,6 +38,7 @@ def client(session):
 def engine():
     with PostgresContainer('postgres:latest', driver='psycopg') as postgres:
         _engine = create_async_engine(postgres.get_connection_url())
+        instrument_queries(_engine)
         yield _engine
 
 
@@ -45,6 +54,28 @@ async def session(engine):
         await conn.run_sync(table_registry.metadata.drop_all)
 
     await engine.dispose()
+    await principal_cache.clear()
+    await response_cache.clear()
+    count_cache.clear()
+    token_cache.clear()
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+
+    yield executed
+
+    event.remove(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
 
 
 @pytest_asyncio.fixture
@@ -87,6 +118,15 @@ async def token(client, user):
     return response.json()['access_token']
 
 
+@pytest.fixture
+def warm_headers(client, token, statements):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/users/0', headers=headers)
+    statements.clear()
+
+    return headers
+
+
 @pytest_asyncio.fixture
 async def novelist(session: AsyncSession) -> Novelist:
     novelist = NovelistFactory()
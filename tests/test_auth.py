@@ -102,3 +102,16 @@ def test_token_expired_dont_refresh(client, user):
 
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {'detail': 'Could not validate credentials.'}
+
+
+def test_logout_revokes_the_token(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.post('/auth/logout', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'message': 'Logged out successfully.'}
+    assert (
+        client.get(f'/users/{user.id}', headers=headers).status_code
+        == HTTPStatus.UNAUTHORIZED
+    )
@@ -1,7 +1,15 @@
+import csv
+import json
+from datetime import datetime
 from http import HTTPStatus
 
 import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
+from madr_fastapi import services
+from madr_fastapi.models import Book, table_registry
+from madr_fastapi.pagination import count_cache, encode_cursor, estimate_rows
 from madr_fastapi.schemas import BookPublic
 from tests.conftest import BookFactory
 
@@ -21,7 +29,7 @@ def test_create_book(client, token, novelist):
     assert response.json() == {
         'id': 1,
         'year': 2026,
-        'title': 'o rei floreal',
+        'title': 'O Rei Floreal',
         'novelist_id': novelist.id,
     }
 
@@ -45,7 +53,11 @@ def test_list_books(client, book, token):
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'books': [books_schema]}
+    assert response.json() == {
+        'books': [books_schema],
+        'next_cursor': None,
+        'total': None,
+    }
 
 
 def test_list_books_should_return_all_fields(client, token, book):
@@ -96,6 +108,16 @@ async def test_list_books_pagination_should_return_2_books(
     assert len(response.json()['books']) == expected_books
 
 
+@pytest.mark.usefixtures('book')
+def test_list_books_limit_zero_returns_no_books(client, token):
+    response = client.get(
+        '/books/?limit=0', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.json()['books'] == []
+    assert response.json()['next_cursor'] is None
+
+
 @pytest.mark.asyncio
 async def test_list_books_filter_name_should_return_1_book(
     session, client, token, novelist
@@ -115,6 +137,25 @@ async def test_list_books_filter_name_should_return_1_book(
     assert len(response.json()['books']) == expected_books
 
 
+@pytest.mark.asyncio
+async def test_list_books_filter_title_uses_normalized_key(
+    session, client, token, novelist
+):
+    session.add(
+        BookFactory.create(title='Dom Casmurro', novelist_id=novelist.id)
+    )
+    await session.commit()
+
+    response = client.get(
+        '/books/?title=CASMURRO!',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert [book['title'] for book in response.json()['books']] == [
+        'Dom Casmurro'
+    ]
+
+
 @pytest.mark.asyncio
 async def test_list_books_filter_year_should_return_3_books(
     session, client, token, novelist
@@ -198,7 +239,7 @@ def test_patch_book(client, book, token):
         headers={'Authorization': f'Bearer {token}'},
     )
     assert response.status_code == HTTPStatus.OK
-    assert response.json()['title'] == 'cavaleiro da luz'
+    assert response.json()['title'] == 'Cavaleiro da Luz'
 
 
 def test_not_found_patch_book(client, token):
@@ -241,3 +282,502 @@ def test_list_books_filter_max_length(client, token):
     )
 
     assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_list_books_cursor_pagination(session, client, token, novelist):
+    session.add_all(BookFactory.create_batch(5, novelist_id=novelist.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first_page = client.get('/books/?limit=3', headers=headers).json()
+    second_page = client.get(
+        f'/books/?limit=3&cursor={first_page["next_cursor"]}',
+        headers=headers,
+    ).json()
+
+    ids = [book['id'] for book in first_page['books'] + second_page['books']]
+
+    assert ids == [1, 2, 3, 4, 5]
+    assert second_page['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_list_books_cursor_is_stable_on_delete(
+    session, client, token, novelist
+):
+    session.add_all(BookFactory.create_batch(4, novelist_id=novelist.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first_page = client.get('/books/?limit=2', headers=headers).json()
+    client.delete('/books/1', headers=headers)
+    second_page = client.get(
+        f'/books/?limit=2&cursor={first_page["next_cursor"]}',
+        headers=headers,
+    ).json()
+
+    assert [book['id'] for book in second_page['books']] == [3, 4]
+
+
+@pytest.mark.asyncio
+async def test_list_books_exact_count(
+    session, client, novelist, warm_headers, statements
+):
+    session.add_all(BookFactory.create_batch(5, novelist_id=novelist.id))
+    await session.commit()
+    statements.clear()
+
+    first_page = client.get(
+        '/books/?limit=2&count=exact', headers=warm_headers
+    ).json()
+
+    assert len(first_page['books']) == 2  # noqa: PLR2004
+    assert first_page['total'] == 5  # noqa: PLR2004
+    assert len(statements) == 1
+    assert 'OVER ()' in statements[0]
+
+    past_the_end = client.get(
+        '/books/?limit=2&page=4&count=exact', headers=warm_headers
+    ).json()
+
+    assert past_the_end['books'] == []
+    assert past_the_end['total'] == 5  # noqa: PLR2004
+
+
+def test_list_books_exact_count_rejects_cursor(client, token):
+    response = client.get(
+        '/books/?count=exact&cursor=WzFd',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Exact counts are not available with a cursor.'
+    }
+
+
+@pytest.mark.asyncio
+async def test_list_books_estimated_count(
+    session, client, novelist, warm_headers, statements
+):
+    session.add_all(BookFactory.create_batch(5, novelist_id=novelist.id))
+    await session.commit()
+    await session.execute(text('ANALYZE books'))
+    statements.clear()
+
+    response = client.get(
+        '/books/?limit=2&count=estimated', headers=warm_headers
+    )
+
+    assert response.json()['total'] == 5  # noqa: PLR2004
+    assert statements[0].startswith('EXPLAIN')
+
+    statements.clear()
+    client.get('/books/?limit=3&count=estimated', headers=warm_headers)
+
+    assert not any(sql.startswith('EXPLAIN') for sql in statements)
+
+
+@pytest.mark.asyncio
+async def test_estimate_rows_counts_on_sqlite(tmp_path):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path / "db"}')
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        session.add_all(BookFactory.create_batch(3))
+        await session.commit()
+
+        query = select(Book).where(Book.year > 0)
+        assert await estimate_rows(session, query) == 3  # noqa: PLR2004
+
+        session.add(BookFactory())
+        await session.commit()
+        assert await estimate_rows(session, query) == 3  # noqa: PLR2004
+
+    count_cache.clear()
+    await engine.dispose()
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    [
+        'not-a-cursor',
+        encode_cursor('abc'),
+        encode_cursor(True),
+        encode_cursor(1.5),
+        encode_cursor(1, 2),
+    ],
+)
+def test_list_books_invalid_cursor(client, token, cursor):
+    response = client.get(
+        f'/books/?cursor={cursor}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Invalid cursor.'}
+
+
+@pytest.mark.asyncio
+async def test_list_books_search_ranks_results(
+    session, client, token, novelist
+):
+    session.add(
+        BookFactory.create(title='dom casmurro', novelist_id=novelist.id)
+    )
+    session.add(
+        BookFactory.create(
+            title='casmurro casmurro casmurro', novelist_id=novelist.id
+        )
+    )
+    session.add(BookFactory.create(title='iracema', novelist_id=novelist.id))
+    await session.commit()
+
+    response = client.get(
+        '/books/?search=Casm',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert [book['title'] for book in response.json()['books']] == [
+        'casmurro casmurro casmurro',
+        'dom casmurro',
+    ]
+    assert response.json()['next_cursor'] is None
+
+
+def test_list_books_search_rejects_cursor(client, token):
+    response = client.get(
+        '/books/?search=casmurro&cursor=WzFd',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_create_book_duplicate_title(client, book, token):
+    response = client.post(
+        '/books',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'year': 2026,
+            'title': book.title.upper(),
+            'novelist_id': book.novelist_id,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Title already exists.'}
+
+
+def test_create_book_novelist_not_found(client, token):
+    response = client.post(
+        '/books',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'year': 2026, 'title': 'O Rei Floreal', 'novelist_id': 0},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Novelist not found.'}
+
+
+def test_patch_book_keeps_its_own_title(client, book, token):
+    expected_year = 2000
+
+    response = client.patch(
+        f'/books/{book.id}',
+        json={'title': book.title, 'year': expected_year},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['year'] == expected_year
+
+
+@pytest.mark.usefixtures('book')
+@pytest.mark.parametrize(
+    ('request_args', 'expected_statements'),
+    [
+        (
+            (
+                'POST',
+                '/books/',
+                {'year': 2026, 'title': 'Iracema', 'novelist_id': 1},
+            ),
+            1,
+        ),
+        (('PATCH', '/books/1', {'title': 'Senhora'}), 1),
+        (('DELETE', '/books/1', None), 1),
+    ],
+)
+def test_book_write_endpoints_statement_count(
+    client, warm_headers, statements, request_args, expected_statements
+):
+    method, url, payload = request_args
+
+    response = client.request(method, url, headers=warm_headers, json=payload)
+
+    assert response.status_code < HTTPStatus.BAD_REQUEST
+    assert len(statements) == expected_statements
+
+
+@pytest.mark.asyncio
+async def test_export_books_ndjson(session, client, token, novelist):
+    session.add_all(BookFactory.create_batch(3, novelist_id=novelist.id))
+    session.add(
+        BookFactory.create(title='dom casmurro', novelist_id=novelist.id)
+    )
+    await session.commit()
+
+    response = client.get(
+        '/books/export',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'search': 'casmurro'},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [book['title'] for book in lines] == ['dom casmurro']
+    assert set(lines[0]) == set(BookPublic.model_fields) | {'updated_at'}
+
+
+@pytest.mark.asyncio
+async def test_export_books_csv(session, client, token, novelist):
+    session.add_all(BookFactory.create_batch(3, novelist_id=novelist.id))
+    await session.commit()
+
+    response = client.get(
+        '/books/export?format=csv',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    rows = list(csv.DictReader(response.text.splitlines()))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert [int(row['id']) for row in rows] == [1, 2, 3]
+    assert list(rows[0]) == [*BookPublic.model_fields, 'updated_at']
+
+
+@pytest.mark.asyncio
+async def test_export_books_updated_since(session, client, token, novelist):
+    session.add_all(BookFactory.create_batch(3, novelist_id=novelist.id))
+    await session.commit()
+    await session.execute(update(Book).values(updated_at=datetime(2000, 1, 1)))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.patch('/books/2', headers=headers, json={'year': 2001})
+    response = client.get(
+        '/books/export',
+        headers=headers,
+        params={'updated_since': '2001-01-01T00:00:00'},
+    )
+
+    assert [
+        json.loads(line)['id'] for line in response.text.splitlines()
+    ] == [2]
+
+
+def test_export_books_csv_without_rows_has_header(client, token):
+    response = client.get(
+        '/books/export?format=csv',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.text.splitlines() == [
+        'year,title,novelist_id,id,updated_at'
+    ]
+
+
+def test_create_books_bulk(client, book, warm_headers, statements):
+    response = client.post(
+        '/books/bulk',
+        headers=warm_headers,
+        json=[
+            {'year': 1899, 'title': 'Dom Casmurro', 'novelist_id': 1},
+            {'year': 1865, 'title': 'Iracema', 'novelist_id': 1},
+            {'year': 1899, 'title': 'dom casmurro', 'novelist_id': 1},
+            {'year': 1900, 'title': book.title, 'novelist_id': 1},
+            {'year': 1900, 'title': 'Helena', 'novelist_id': 99},
+        ],
+    )
+    items = response.json()['books']
+
+    assert response.status_code == HTTPStatus.OK
+    assert [item['status'] for item in items] == [201, 201, 409, 409, 404]
+    assert [item['id'] for item in items[:2]] == [2, 3]
+    assert items[1]['book'] == {
+        'id': 3,
+        'year': 1865,
+        'title': 'Iracema',
+        'novelist_id': 1,
+    }
+    assert items[4]['detail'] == 'Novelist not found.'
+    assert len(statements) == 3  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_update_books_bulk(session, client, token, novelist):
+    session.add_all(BookFactory.create_batch(3, novelist_id=novelist.id))
+    await session.commit()
+
+    response = client.patch(
+        '/books/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'id': 1, 'title': 'Senhora', 'year': 1875},
+            {'id': 2, 'year': 1900},
+            {'id': 2, 'year': 1901},
+            {'id': 3, 'title': 'senhora'},
+            {'id': 3, 'novelist_id': 99},
+            {'id': 99, 'year': 1900},
+        ],
+    )
+    items = response.json()['books']
+
+    assert [item['status'] for item in items] == [
+        200,
+        200,
+        409,
+        409,
+        404,
+        404,
+    ]
+    assert items[0]['book']['title'] == 'Senhora'
+    assert items[1]['book']['year'] == 1900  # noqa: PLR2004
+    assert items[3]['detail'] == 'Title already exists.'
+
+
+@pytest.mark.asyncio
+async def test_updates_derive_title_keys(session, client, token, novelist):
+    session.add_all(BookFactory.create_batch(2, novelist_id=novelist.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.patch('/books/1', headers=headers, json={'title': 'Dom  CASMURRO!'})
+    client.patch('/books/2', headers=headers, json={'year': 1900})
+    client.patch(
+        '/books/bulk', headers=headers, json=[{'id': 2, 'title': 'Iracema.'}]
+    )
+
+    keys = await session.execute(
+        select(Book.id, Book.title_key).order_by(Book.id)
+    )
+
+    assert keys.all() == [(1, 'dom casmurro'), (2, 'iracema')]
+
+
+@pytest.mark.asyncio
+async def test_delete_books_bulk(session, client, token, novelist):
+    session.add_all(BookFactory.create_batch(2, novelist_id=novelist.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.request(
+        'DELETE', '/books/bulk', headers=headers, json=[2, 99]
+    )
+
+    assert [
+        (item['id'], item['status']) for item in response.json()['books']
+    ] == [(2, 200), (99, 404)]
+    assert client.get('/books/2', headers=headers).status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+def test_bulk_rejects_empty_and_oversized_batches(client, token, monkeypatch):
+    monkeypatch.setattr(services.settings, 'BULK_MAX_ITEMS', 2)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    empty = client.request('DELETE', '/books/bulk', headers=headers, json=[])
+    oversized = client.request(
+        'DELETE', '/books/bulk', headers=headers, json=[1, 2, 3]
+    )
+
+    assert empty.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert oversized.json() == {
+        'detail': 'Bulk requests take between 1 and 2 items.'
+    }
+
+
+def test_get_book_conditional_requests(client, book, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first = client.get(f'/books/{book.id}', headers=headers)
+    etag = first.headers['etag']
+    not_modified = client.get(
+        f'/books/{book.id}', headers={**headers, 'If-None-Match': etag}
+    )
+    client.patch(f'/books/{book.id}', headers=headers, json={'year': 2001})
+    modified = client.get(
+        f'/books/{book.id}', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert etag.startswith('W/"')
+    assert first.headers['cache-control'].startswith('private')
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert not_modified.content == b''
+    assert not_modified.headers['etag'] == etag
+    assert modified.status_code == HTTPStatus.OK
+    assert modified.headers['etag'] != etag
+
+
+def test_get_book_not_modified_uses_one_row_query(
+    client, book, warm_headers, statements
+):
+    etag = client.get(f'/books/{book.id}', headers=warm_headers).headers[
+        'etag'
+    ]
+    statements.clear()
+
+    response = client.get(
+        f'/books/{book.id}', headers={**warm_headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert len(statements) == 1
+    assert 'books.version' in statements[0]
+
+
+def test_list_books_conditional_requests(client, book, other_book, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    etag = client.get('/books/', headers=headers).headers['etag']
+    not_modified = client.get(
+        '/books/', headers={**headers, 'If-None-Match': etag}
+    )
+    client.delete(f'/books/{other_book.id}', headers=headers)
+    modified = client.get(
+        '/books/', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert modified.status_code == HTTPStatus.OK
+    assert len(modified.json()['books']) == 1
+
+
+def test_list_books_served_from_response_cache(
+    client, book, warm_headers, statements
+):
+    client.get('/books/?year=2000', headers=warm_headers)
+    statements.clear()
+
+    cached = client.get('/books/?page=1&year=2000', headers=warm_headers)
+
+    assert cached.status_code == HTTPStatus.OK
+    assert cached.headers['content-type'] == 'application/json'
+    assert statements == []
+
+
+def test_book_writes_invalidate_response_cache(client, book, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    original_year = book.year
+
+    before = client.get('/books/', headers=headers).json()
+    client.patch(f'/books/{book.id}', headers=headers, json={'year': 1999})
+    after = client.get('/books/', headers=headers).json()
+
+    assert before['books'][0]['year'] == original_year
+    assert after['books'][0]['year'] == 1999  # noqa: PLR2004
@@ -0,0 +1,162 @@
+import pytest
+from freezegun import freeze_time
+from sqlalchemy import inspect
+
+from madr_fastapi.cache import (
+    MemoryBackend,
+    PrincipalCache,
+    RedisBackend,
+    ResponseCache,
+    TTLCache,
+)
+from madr_fastapi.models import User
+from madr_fastapi.schemas import BookFilter
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def scan_iter(self, match):
+        for key in list(self.data):
+            if key.startswith(match.rstrip('*')):
+                yield key
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3  # noqa: PLR2004
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    with freeze_time('2026-01-01 12:00:00'):
+        cache.set('a', 1)
+
+    with freeze_time('2026-01-01 12:01:01'):
+        assert cache.get('a') is None
+
+    assert cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_roundtrip():
+    cache = PrincipalCache(MemoryBackend(maxsize=8, ttl=60))
+    user = User(username='alice', email='alice@test.com', password='hash')
+    user.id = 1
+
+    await cache.set(user.email, user)
+    cached = await cache.get(user.email)
+
+    assert cached is not user
+    assert (cached.id, cached.username, cached.email) == (
+        1,
+        'alice',
+        'alice@test.com',
+    )
+    assert 'hash' not in await cache.backend.get(user.email)
+    assert 'password' in inspect(cached).unloaded
+
+
+@pytest.mark.asyncio
+async def test_shared_backend_propagates_invalidation():
+    redis = FakeRedis()
+    worker_a = PrincipalCache(RedisBackend(redis, ttl=60, prefix='p:'))
+    worker_b = PrincipalCache(RedisBackend(redis, ttl=60, prefix='p:'))
+    user = User(username='alice', email='alice@test.com', password='hash')
+    user.id = 1
+
+    await worker_a.set(user.email, user)
+    assert await worker_b.get(user.email) is not None
+
+    await worker_b.invalidate(user.email)
+    assert await worker_a.get(user.email) is None
+
+
+@pytest.mark.asyncio
+async def test_response_cache_roundtrip_and_generations():
+    client = FakeRedis()
+    cache = ResponseCache(RedisBackend(client, ttl=30, prefix='r:'))
+    other_worker = ResponseCache(RedisBackend(client, ttl=30, prefix='r:'))
+
+    key = await cache.key('books', BookFilter(title='casmurro'), 'books')
+    await cache.set(key, 'W/"abc"', b'{"books":[]}')
+
+    assert await other_worker.get(key) == ('W/"abc"', b'{"books":[]}')
+    assert key == await other_worker.key(
+        'books', BookFilter(title='casmurro', page=1), 'books'
+    )
+
+    await other_worker.invalidate('books')
+    new_key = await cache.key('books', BookFilter(title='casmurro'), 'books')
+
+    assert new_key != key
+    assert await cache.get(new_key) is None
+
+
+@pytest.mark.asyncio
+async def test_response_cache_restarts_lost_generation():
+    generations = MemoryBackend(maxsize=10, ttl=3600)
+    cache = ResponseCache(MemoryBackend(maxsize=10, ttl=30), generations)
+
+    tables = ('novelists', 'books')
+
+    key = await cache.key('novelists', BookFilter(), *tables)
+    await generations.delete('generation:books')
+
+    assert await cache.key('novelists', BookFilter(), *tables) != key
+
+
+@pytest.mark.asyncio
+async def test_response_cache_body_evictions_keep_generations():
+    cache = ResponseCache(
+        MemoryBackend(maxsize=1, ttl=30), MemoryBackend(maxsize=10, ttl=3600)
+    )
+
+    with freeze_time('2026-01-01 12:00:00'):
+        key = await cache.key('books', BookFilter(), 'books')
+        for page in range(2, 5):
+            await cache.set(f'page:{page}', 'W/"a"', b'{}')
+
+    with freeze_time('2026-01-01 12:01:00'):
+        assert await cache.key('books', BookFilter(), 'books') == key
+
+
+@pytest.mark.asyncio
+async def test_response_cache_skips_stale_replica_reads():
+    cache = ResponseCache(MemoryBackend(maxsize=10, ttl=30), settle_seconds=5)
+    body = b'{"books":[]}'
+
+    with freeze_time('2026-01-01 12:00:00'):
+        await cache.invalidate('books')
+        key = await cache.key('books', BookFilter(), 'books')
+        await cache.store(key, 'W/"a"', body, 'books', read_from='replica')
+        await cache.store(key, 'W/"a"', body, 'books', read_from='sticky')
+
+        assert await cache.get(key) is None
+
+    with freeze_time('2026-01-01 12:00:06'):
+        await cache.store(key, 'W/"b"', body, 'books', read_from='replica')
+
+        assert await cache.lookup(key, 'replica') == ('W/"b"', body)
+        assert await cache.lookup(key, 'sticky') is None
@@ -0,0 +1,21 @@
+from madr_fastapi.cli import main
+
+
+def test_explain_reports_sequential_scans(tmp_path, capsys):
+    database_url = f'sqlite+aiosqlite:///{tmp_path / "explain.db"}'
+
+    status = main([
+        'explain',
+        '--database-url',
+        database_url,
+        '--seed',
+        '200',
+        '--strict',
+    ])
+
+    output = capsys.readouterr().out
+
+    assert status == 1
+    assert 'SEQ SCAN  list_books?title' in output
+    assert '      ok  list_books?year' in output
+    assert '      ok  novelist_books' in output
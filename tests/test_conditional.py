@@ -0,0 +1,31 @@
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+from madr_fastapi.conditional import etag_matches, row_version, weak_etag
+
+
+def test_weak_etag_is_stable_and_weak():
+    assert weak_etag(1, 2) == weak_etag(1, 2)
+    assert weak_etag(1, 2) != weak_etag(1, 3)
+    assert weak_etag(1, 2).startswith('W/"')
+
+
+def test_etag_matches_uses_weak_comparison():
+    etag = weak_etag(1, 2)
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag.removeprefix('W/'), etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('W/"other"', etag)
+
+
+def test_row_version_tells_reused_ids_apart():
+    first = SimpleNamespace(
+        id=1, version=1, updated_at=datetime(2026, 1, 1, tzinfo=UTC)
+    )
+    reused = SimpleNamespace(
+        id=1, version=1, updated_at=datetime(2026, 1, 2, tzinfo=UTC)
+    )
+
+    assert weak_etag(row_version(first)) != weak_etag(row_version(reused))
@@ -0,0 +1,292 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from madr_fastapi import database
+from madr_fastapi.app import app
+from madr_fastapi.app import settings as app_settings
+from madr_fastapi.cache import MemoryBackend
+from madr_fastapi.database import (
+    InstrumentedQueuePool,
+    ReplicaRouter,
+    create_replica_router,
+    enable_foreign_keys,
+    engine_options,
+    get_read_session,
+    instrument_pool,
+    parameters_shape,
+    pool_metrics,
+    replica_router,
+    sticky_key,
+)
+from madr_fastapi.models import Book, Novelist, table_registry
+from madr_fastapi.settings import Settings
+
+
+def test_engine_options_from_settings():
+    settings = Settings(
+        DATABASE_URL='postgresql+psycopg://madr@localhost/madr',
+        DATABASE_POOL_SIZE=20,
+        DATABASE_MAX_OVERFLOW=5,
+        DATABASE_POOL_TIMEOUT=2,
+        DATABASE_POOL_RECYCLE=300,
+        DATABASE_POOL_PRE_PING=True,
+    )
+
+    assert engine_options(settings) == {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': 20,
+        'max_overflow': 5,
+        'pool_timeout': 2,
+        'pool_recycle': 300,
+        'pool_pre_ping': True,
+    }
+
+
+def test_engine_options_keep_replicas_out_of_pool_metrics():
+    settings = Settings(
+        DATABASE_URL='postgresql+psycopg://madr@localhost/madr'
+    )
+    url = 'postgresql+psycopg://madr@replica/madr'
+
+    options = engine_options(settings, url, replica=True)
+
+    assert options['poolclass'] is AsyncAdaptedQueuePool
+    assert options['pool_size'] == settings.DATABASE_POOL_SIZE
+
+
+def test_engine_options_pgbouncer_mode():
+    settings = Settings(
+        DATABASE_URL='postgresql+psycopg://madr@localhost/madr',
+        DATABASE_PGBOUNCER=True,
+    )
+
+    assert engine_options(settings) == {
+        'poolclass': NullPool,
+        'connect_args': {'prepare_threshold': None},
+    }
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_records_checkouts(tmp_path):
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "pool.db"}',
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+    )
+    instrument_pool(engine)
+    checkouts = pool_metrics.checkouts
+
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+        assert pool_metrics.checkouts - pool_metrics.checkins >= 1
+
+    await engine.dispose()
+
+    assert pool_metrics.checkouts == checkouts + 1
+
+
+def test_pool_metrics_endpoint(client):
+    response = client.get('/metrics/pool')
+
+    assert response.status_code == HTTPStatus.OK
+    assert {'in_use', 'checkouts', 'timeouts', 'wait_avg_ms'} <= set(
+        response.json()
+    )
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cascades_book_deletes(tmp_path):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path / "fk.db"}')
+    enable_foreign_keys(engine)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(insert(Novelist), [{'name': 'a'}])
+        await conn.execute(
+            insert(Book), [{'title': 'b', 'year': 2000, 'novelist_id': 1}]
+        )
+        await conn.execute(text('DELETE FROM novelists'))
+
+        assert await conn.scalar(text('SELECT count(*) FROM books')) == 0
+
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def stand_ins(tmp_path):
+    engines = []
+    for name in ('primary', 'replica_a', 'replica_b'):
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{tmp_path / name}.db'
+        )
+        async with engine.begin() as conn:
+            await conn.execute(text('CREATE TABLE node (name TEXT)'))
+            await conn.execute(
+                text('INSERT INTO node VALUES (:name)'), {'name': name}
+            )
+        engines.append(engine)
+
+    yield engines
+
+    for engine in engines:
+        await engine.dispose()
+
+
+async def served_by(router, key=None):
+    async with router.session(key) as session:
+        return await session.scalar(text('SELECT name FROM node'))
+
+
+@pytest.mark.asyncio
+async def test_replica_router_round_robin(stand_ins):
+    primary, *replicas = stand_ins
+    router = ReplicaRouter(primary, replicas)
+
+    served = [await served_by(router) for _ in range(4)]
+
+    assert served == ['replica_a', 'replica_b', 'replica_a', 'replica_b']
+    assert router.snapshot()['routed'] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_replica_router_least_connections(stand_ins):
+    primary, *replicas = stand_ins
+    router = ReplicaRouter(primary, replicas, 'least_connections')
+
+    async with router.session() as busy:
+        await busy.execute(text('SELECT 1'))
+        assert router.in_use == [1, 0]
+
+        served = [await served_by(router) for _ in range(3)]
+
+    assert served == ['replica_b'] * 3
+    assert router.in_use == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_replica_router_without_replicas_uses_primary(stand_ins):
+    primary, *_ = stand_ins
+    router = ReplicaRouter(primary, [])
+    await router.mark_write('writer')
+
+    assert await served_by(router) == 'primary'
+    assert router.snapshot()['sticky_reads'] == 0
+
+
+@pytest.mark.asyncio
+async def test_replica_router_reads_your_writes(stand_ins):
+    primary, *replicas = stand_ins
+    router = ReplicaRouter(primary, replicas, sticky_seconds=0.05)
+
+    await router.mark_write('writer')
+
+    assert await served_by(router, 'writer') == 'primary'
+    assert await served_by(router, 'reader') == 'replica_a'
+    assert router.sticky_reads == 1
+
+    await asyncio.sleep(0.06)
+
+    assert await served_by(router, 'writer') == 'replica_b'
+
+    await router.mark_write('writer')
+    async with router.session('writer') as session:
+        assert session.info['read_from'] == 'sticky'
+    async with router.session('reader') as session:
+        assert session.info['read_from'] == 'replica'
+
+
+@pytest.mark.asyncio
+async def test_workers_share_sticky_marks(stand_ins):
+    primary, *replicas = stand_ins
+    shared = MemoryBackend(16, 60)
+    worker_a = ReplicaRouter(primary, replicas, writers=shared)
+    worker_b = ReplicaRouter(primary, replicas, writers=shared)
+
+    await worker_a.mark_write('writer')
+
+    assert await served_by(worker_b, 'writer') == 'primary'
+    assert await served_by(worker_b, 'reader') == 'replica_a'
+
+
+@pytest.mark.asyncio
+async def test_writes_mark_the_caller_sticky(client, token, monkeypatch):
+    monkeypatch.setattr(replica_router, 'replicas', [object()])
+    authorization = f'Bearer {token}'
+
+    client.get('/novelists/', headers={'Authorization': authorization})
+    assert not await replica_router.is_sticky(sticky_key(authorization))
+
+    response = client.post(
+        '/novelists/',
+        headers={'Authorization': authorization},
+        json={'name': 'machado de assis'},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert await replica_router.is_sticky(sticky_key(authorization))
+    assert sticky_key(None) is None
+
+
+def test_replica_queries_are_profiled(
+    tmp_path, client, warm_headers, monkeypatch
+):
+    path = tmp_path / 'replica.db'
+    table_registry.metadata.create_all(create_engine(f'sqlite:///{path}'))
+    router = create_replica_router(
+        Settings(READ_DATABASE_URLS=[f'sqlite+aiosqlite:///{path}']),
+        database.engine,
+    )
+    monkeypatch.setattr(database, 'replica_router', router)
+    monkeypatch.delitem(app.dependency_overrides, get_read_session)
+    monkeypatch.setattr(app_settings, 'DEBUG_SERVER_TIMING', True)
+
+    response = client.get('/novelists/', headers=warm_headers)
+    client.portal.call(router.dispose)
+
+    assert router.routed == [1]
+    assert 'db-statements;desc="1"' in response.headers['server-timing']
+
+
+def test_replica_metrics_endpoint(client):
+    response = client.get('/metrics/replicas')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['replicas'] == 0
+
+
+def test_parameters_shape_hides_values():
+    assert parameters_shape({'email': 'a@b.c', 'id_1': 1}) == {
+        'email': 'str',
+        'id_1': 'int',
+    }
+    assert parameters_shape(('secret', 2.5, None)) == [
+        'str',
+        'float',
+        'NoneType',
+    ]
+
+
+@pytest.mark.usefixtures('book')
+def test_slow_queries_are_logged(client, warm_headers, monkeypatch, caplog):
+    client.get('/books/1', headers=warm_headers)
+    assert not caplog.records
+
+    monkeypatch.setattr(database.settings, 'SLOW_QUERY_MS', 0)
+    with caplog.at_level('WARNING', logger='madr_fastapi.slow_query'):
+        client.get('/books/1', headers=warm_headers)
+
+    record = json.loads(caplog.records[0].getMessage())
+
+    assert record['event'] == 'slow_query'
+    assert record['route'] == '/books/{book_id}'
+    assert 'FROM books WHERE books.id' in record['statement']
+    assert 'int' in str(record['parameters'])
+    assert record['elapsed_ms'] >= 0
+    assert caplog.records[0].slow_query == record
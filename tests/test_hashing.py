@@ -0,0 +1,62 @@
+from http import HTTPStatus
+
+import pytest
+
+from madr_fastapi.hashing import HashingExecutor, hashing_executor
+from madr_fastapi.security import (
+    get_password_hash,
+    get_password_hash_async,
+    verify_password,
+    verify_password_async,
+)
+
+
+@pytest.mark.asyncio
+async def test_async_hash_and_verify():
+    hashed = await get_password_hash_async('secret')
+
+    assert await verify_password_async('secret', hashed)
+    assert not await verify_password_async('wrong', hashed)
+
+
+@pytest.mark.asyncio
+async def test_process_pool_mode():
+    executor = HashingExecutor(mode='process', max_workers=1, queue_limit=4)
+
+    hashed = await executor.run(get_password_hash, 'secret')
+    executor.shutdown()
+
+    assert verify_password('secret', hashed)
+    assert executor.metrics()['completed'] == 1
+
+
+def test_hashing_queue_full_returns_503(client, monkeypatch):
+    monkeypatch.setattr(hashing_executor, 'queue_limit', 0)
+
+    response = client.post(
+        '/users',
+        json={
+            'username': 'alice',
+            'email': 'alice@example.com',
+            'password': 'secret',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'detail': 'Server busy, try again later.'}
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_hashing_metrics(client, user):
+    client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    response = client.get('/metrics/hashing')
+    metrics = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert metrics['queue_depth'] == 0
+    assert metrics['completed'] >= 1
+    assert metrics['hash_latency_max_ms'] > 0
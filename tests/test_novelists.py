@@ -1,9 +1,15 @@
+import csv
 from http import HTTPStatus
 
 import pytest
+from sqlalchemy import func, select
 
+from madr_fastapi.models import Book, Novelist
+from madr_fastapi.routers import novelists
+from madr_fastapi.routers.novelists import settings
 from madr_fastapi.schemas import NovelistPublic
-from tests.conftest import NovelistFactory
+from madr_fastapi.services import delete_novelist_in_chunks, insert_or_skip
+from tests.conftest import BookFactory, NovelistFactory
 
 
 def test_create_novelist(client, token):
@@ -14,7 +20,7 @@ def test_create_novelist(client, token):
     )
 
     assert response.status_code == HTTPStatus.CREATED
-    assert response.json() == {'id': 1, 'name': 'mario brás'}
+    assert response.json() == {'id': 1, 'name': 'Mario Brás'}
 
 
 def test_update_integrity_error(client, novelist, other_novelist, token):
@@ -38,7 +44,11 @@ def test_list_novelists(client, novelist, token):
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'novelists': [novelists_schema]}
+    assert response.json() == {
+        'novelists': [novelists_schema],
+        'next_cursor': None,
+        'total': None,
+    }
 
 
 def test_list_novelists_should_return_all_fields(client, token, novelist):
@@ -84,6 +94,16 @@ async def test_list_novelists_pagination_should_return_2_novelists(
     assert len(response.json()['novelists']) == expected_novelists
 
 
+@pytest.mark.usefixtures('novelist')
+def test_list_novelists_limit_zero_returns_no_novelists(client, token):
+    response = client.get(
+        '/novelists/?limit=0', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.json()['novelists'] == []
+    assert response.json()['next_cursor'] is None
+
+
 @pytest.mark.asyncio
 async def test_list_novelists_filter_name_should_return_5_novelists(
     session, client, token
@@ -141,6 +161,91 @@ def test_delete_novelist(client, novelist, token):
     assert response.json() == {'message': 'Novelist deleted in MADR.'}
 
 
+def test_delete_novelist_cascades_to_books(client, book, token, statements):
+    statements.clear()
+
+    response = client.delete(
+        f'/novelists/{book.novelist_id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert not any('DELETE FROM books' in sql for sql in statements)
+
+    response = client.get(
+        f'/books/{book.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_delete_novelist_in_background(
+    session, client, novelist, token
+):
+    session.add_all(BookFactory.create_batch(3, novelist_id=novelist.id))
+    await session.commit()
+
+    response = client.delete(
+        f'/novelists/{novelist.id}?background=true',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json() == {'message': 'Novelist deletion scheduled.'}
+    assert await session.scalar(select(func.count()).select_from(Book)) == 0
+    assert (
+        await session.scalar(select(func.count()).select_from(Novelist)) == 0
+    )
+
+
+def test_not_found_delete_novelist_in_background(client, token):
+    response = client.delete(
+        '/novelists/0?background=true',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_delete_novelist_in_chunks(session, novelist, statements):
+    session.add_all(BookFactory.create_batch(5, novelist_id=novelist.id))
+    await session.commit()
+    statements.clear()
+    commits = []
+
+    async def on_commit():
+        commits.append(len(statements))
+
+    await delete_novelist_in_chunks(
+        session.bind, novelist.id, chunk_size=2, on_commit=on_commit
+    )
+
+    book_deletes = [sql for sql in statements if 'DELETE FROM books' in sql]
+    assert len(book_deletes) == 3  # noqa: PLR2004
+    assert len(commits) == len(book_deletes)
+    assert await session.scalar(select(func.count()).select_from(Book)) == 0
+
+
+@pytest.mark.asyncio
+async def test_purge_novelist_logs_failures(monkeypatch, caplog):
+    async def failing_delete(bind, novelist_id, on_commit):
+        await on_commit()
+        raise RuntimeError('connection lost')
+
+    monkeypatch.setattr(
+        novelists, 'delete_novelist_in_chunks', failing_delete
+    )
+
+    novelist_id = 7
+
+    with caplog.at_level('ERROR', logger='madr_fastapi.novelists'):
+        await novelists.purge_novelist(None, novelist_id)
+
+    assert [record.novelist_id for record in caplog.records] == [novelist_id]
+
+
 def test_not_found_delete_novelist(client, token):
     response = client.delete(
         '/novelists/0', headers={'Authorization': f'Bearer {token}'}
@@ -157,7 +262,7 @@ def test_patch_novelist(client, novelist, token):
         headers={'Authorization': f'Bearer {token}'},
     )
     assert response.status_code == HTTPStatus.OK
-    assert response.json()['name'] == 'joão de lima'
+    assert response.json()['name'] == 'João de Lima'
 
 
 def test_not_found_patch_novelist(client, token):
@@ -189,3 +294,257 @@ def test_list_novelists_filter_max_length(client, token):
     )
 
     assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_list_novelist_include_books(client, book, token):
+    response = client.get(
+        f'/novelists/{book.novelist_id}?include=books',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['books'] == [
+        {
+            'id': book.id,
+            'year': book.year,
+            'title': book.title,
+            'novelist_id': book.novelist_id,
+        }
+    ]
+
+
+def test_list_novelists_include_books(client, book, other_novelist, token):
+    response = client.get(
+        '/novelists/?include=books',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    books_by_novelist = {
+        novelist['id']: len(novelist['books'])
+        for novelist in response.json()['novelists']
+    }
+
+    assert response.status_code == HTTPStatus.OK
+    assert books_by_novelist == {book.novelist_id: 1, other_novelist.id: 0}
+
+
+def test_list_novelists_exact_count_with_books(
+    client, book, other_novelist, token
+):
+    response = client.get(
+        '/novelists/?include=books&limit=1&count=exact',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()['novelists']) == 1
+    assert response.json()['total'] == 2  # noqa: PLR2004
+
+
+def test_list_novelists_invalid_include(client, token):
+    response = client.get(
+        '/novelists/?include=everything',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.usefixtures('book')
+@pytest.mark.parametrize(
+    ('request_args', 'expected_statements'),
+    [
+        (('GET', '/novelists/1', None), 1),
+        (('GET', '/novelists/1?include=books', None), 2),
+        (('GET', '/novelists/', None), 1),
+        (('GET', '/novelists/?include=books', None), 2),
+        (('POST', '/novelists/', {'name': 'Machado de Assis'}), 1),
+        (('PATCH', '/novelists/1', {'name': 'Clarice Lispector'}), 1),
+        (('DELETE', '/novelists/1', None), 1),
+    ],
+)
+def test_novelist_endpoints_statement_count(
+    client, warm_headers, statements, request_args, expected_statements
+):
+    method, url, payload = request_args
+
+    response = client.request(method, url, headers=warm_headers, json=payload)
+
+    assert response.status_code < HTTPStatus.BAD_REQUEST
+    assert len(statements) == expected_statements
+
+
+@pytest.mark.asyncio
+async def test_list_novelists_cursor_pagination(session, client, token):
+    session.add_all(NovelistFactory.create_batch(5))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first_page = client.get('/novelists/?limit=3', headers=headers).json()
+    second_page = client.get(
+        f'/novelists/?limit=3&cursor={first_page["next_cursor"]}',
+        headers=headers,
+    ).json()
+
+    ids = [
+        novelist['id']
+        for novelist in first_page['novelists'] + second_page['novelists']
+    ]
+
+    assert ids == [1, 2, 3, 4, 5]
+    assert second_page['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_list_novelists_search(session, client, token):
+    session.add(NovelistFactory.create(name='machado de assis'))
+    session.add(NovelistFactory.create(name='jose de alencar'))
+    await session.commit()
+
+    response = client.get(
+        '/novelists/?search=mach assis',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert [
+        novelist['name'] for novelist in response.json()['novelists']
+    ] == ['machado de assis']
+
+
+@pytest.mark.parametrize(
+    ('term', 'expected'),
+    [
+        ("O'Neill", ["Eugene O'Neill"]),
+        ('oneill', ["Eugene O'Neill"]),
+        ('Jean-Paul', ['Jean-Paul Sartre']),
+        ('jeanpaul sartre', ['Jean-Paul Sartre']),
+    ],
+)
+def test_list_novelists_search_matches_punctuated_names(
+    client, token, term, expected
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    for name in ("Eugene O'Neill", 'Jean-Paul Sartre'):
+        client.post('/novelists/', headers=headers, json={'name': name})
+
+    searched = client.get(
+        '/novelists/', headers=headers, params={'search': term}
+    ).json()
+    filtered = client.get(
+        '/novelists/', headers=headers, params={'name': term}
+    ).json()
+
+    assert [novelist['name'] for novelist in searched['novelists']] == (
+        expected
+    )
+    assert searched['novelists'] == filtered['novelists']
+
+
+def test_create_novelist_duplicate_name(client, novelist, token):
+    response = client.post(
+        '/novelists',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'name': novelist.name.upper()},
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Name already exists.'}
+
+
+@pytest.mark.asyncio
+async def test_export_novelists_csv(session, client, token):
+    session.add(NovelistFactory.create(name='machado de assis'))
+    session.add(NovelistFactory.create(name='jose de alencar'))
+    await session.commit()
+
+    response = client.get(
+        '/novelists/export?format=csv&name=assis',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    rows = list(csv.DictReader(response.text.splitlines()))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-disposition'] == (
+        'attachment; filename="novelists.csv"'
+    )
+    assert [row['name'] for row in rows] == ['machado de assis']
+    assert set(rows[0]) == {'id', 'name', 'updated_at'}
+
+
+def test_create_novelists_bulk(client, novelist, warm_headers, statements):
+    response = client.post(
+        '/novelists/bulk',
+        headers=warm_headers,
+        json=[
+            {'name': 'Machado de Assis'},
+            {'name': novelist.name.upper()},
+            {'name': '  machado   de assis!'},
+            {'name': 'José de Alencar'},
+        ],
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'created': [
+            {'id': 2, 'name': 'Machado de Assis'},
+            {'id': 3, 'name': 'José de Alencar'},
+        ],
+        'existing': [{'id': novelist.id, 'name': novelist.name}],
+    }
+    assert len(statements) == 2  # noqa: PLR2004
+
+
+def test_create_novelists_bulk_all_existing(client, novelist, token):
+    response = client.post(
+        '/novelists/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[{'name': novelist.name}],
+    )
+
+    assert response.json() == {
+        'created': [],
+        'existing': [{'id': novelist.id, 'name': novelist.name}],
+    }
+
+
+def test_create_novelists_bulk_limit(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'NOVELIST_BULK_MAX_ITEMS', 1)
+
+    response = client.post(
+        '/novelists/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[{'name': 'a'}, {'name': 'b'}],
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_insert_or_skip_ignores_conflicting_rows(session, novelist):
+    statement = insert_or_skip(
+        Novelist, session.bind.dialect.name, 'name_key'
+    ).returning(Novelist)
+
+    db_novelists = await session.scalars(
+        statement, [{'name': novelist.name}, {'name': 'machado de assis'}]
+    )
+
+    assert [db_novelist.name for db_novelist in db_novelists] == [
+        'machado de assis'
+    ]
+
+
+def test_get_novelist_with_books_etag_follows_books(client, book, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    url = f'/novelists/{book.novelist_id}?include=books'
+
+    etag = client.get(url, headers=headers).headers['etag']
+    plain_etag = client.get(
+        f'/novelists/{book.novelist_id}', headers=headers
+    ).headers['etag']
+    client.patch(f'/books/{book.id}', headers=headers, json={'year': 2001})
+    response = client.get(url, headers={**headers, 'If-None-Match': etag})
+
+    assert plain_etag != etag
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['books'][0]['year'] == 2001  # noqa: PLR2004
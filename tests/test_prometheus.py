@@ -0,0 +1,125 @@
+from http import HTTPStatus
+
+import pytest
+
+from madr_fastapi.app import settings as app_settings
+from madr_fastapi.prometheus import (
+    CONTENT_TYPE,
+    OVERFLOW,
+    Counter,
+    Gauge,
+    Histogram,
+    RequestStats,
+    db_queries_per_request,
+    db_query_duration,
+    http_requests,
+    record_query,
+    request_stats,
+)
+
+
+def test_counter_and_gauge_render():
+    counter = Counter('requests_total', 'Requests.', ('route',))
+    counter.inc('/a')
+    counter.inc('/a', amount=2)
+    counter.inc('say "hi"\n')
+    gauge = Gauge('in_flight', 'In flight.')
+    gauge.inc()
+    gauge.dec()
+
+    assert counter.render() == [
+        '# HELP requests_total Requests.',
+        '# TYPE requests_total counter',
+        'requests_total{route="/a"} 3',
+        'requests_total{route="say \\"hi\\"\\n"} 1',
+    ]
+    assert gauge.render()[-1] == 'in_flight 0'
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency', 'Latency.', buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value)
+
+    assert histogram.render()[2:] == [
+        'latency_bucket{le="0.1"} 2',
+        'latency_bucket{le="1"} 3',
+        'latency_bucket{le="+Inf"} 4',
+        'latency_sum 3.65',
+        'latency_count 4',
+    ]
+
+
+def test_label_cardinality_is_bounded():
+    counter = Counter('paths_total', 'Paths.', ('path',), max_series=2)
+    for path in ('/a', '/b', '/c', '/d', '/a'):
+        counter.inc(path)
+
+    assert counter.value('/a') == 2  # noqa: PLR2004
+    assert counter.value('/c') == 0
+    assert counter.value(OVERFLOW) == 2  # noqa: PLR2004
+
+
+def test_record_query_accumulates_per_request():
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        record_query(0.25)
+        record_query(0.5)
+    finally:
+        request_stats.reset(token)
+    record_query(1)
+
+    assert (stats.count, stats.seconds) == (2, 0.75)
+
+
+@pytest.mark.usefixtures('book')
+def test_metrics_record_route_templates_and_queries(client, warm_headers):
+    route = '/books/{book_id}'
+    requests = http_requests.value('GET', route, '200')
+    observed = db_queries_per_request.count(route)
+    queries = db_query_duration.count()
+
+    client.get('/books/1', headers=warm_headers)
+    client.get('/no-such-path')
+
+    assert http_requests.value('GET', route, '200') == requests + 1
+    assert http_requests.value('GET', '<unmatched>', '404') >= 1
+    assert db_queries_per_request.count(route) == observed + 1
+    assert db_query_duration.count() > queries
+
+
+def test_metrics_endpoint_prometheus_text(client):
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == CONTENT_TYPE
+    assert '# TYPE madr_http_request_duration_seconds histogram' in (
+        response.text
+    )
+    assert 'madr_db_pool_connections{state="in_use"}' in response.text
+    assert 'madr_hashing_queue_depth 0' in response.text
+
+
+@pytest.mark.usefixtures('book')
+def test_server_timing_is_opt_in(client, warm_headers, monkeypatch):
+    response = client.get('/books/1', headers=warm_headers)
+
+    assert 'server-timing' not in response.headers
+
+    monkeypatch.setattr(app_settings, 'DEBUG_SERVER_TIMING', True)
+    response = client.get('/books/1', headers=warm_headers)
+    metrics = {
+        metric.split(';')[0]: metric
+        for metric in response.headers['server-timing'].split(', ')
+    }
+
+    assert set(metrics) == {
+        'db',
+        'db-statements',
+        'auth',
+        'serialize',
+        'total',
+    }
+    assert metrics['db'].startswith('db;dur=')
+    assert metrics['db-statements'] == 'db-statements;desc="1"'
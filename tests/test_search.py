@@ -0,0 +1,81 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from madr_fastapi.models import Book, Novelist, table_registry
+from madr_fastapi.services import apply_search
+
+
+@pytest_asyncio.fixture
+async def sqlite_session():
+    engine = create_async_engine('sqlite+aiosqlite:///:memory:')
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_fts5_fallback_ranks_results(sqlite_session):
+    novelist = Novelist(name='machado de assis')
+    sqlite_session.add(novelist)
+    await sqlite_session.flush()
+    sqlite_session.add_all([
+        Book(title='dom casmurro', year=1899, novelist_id=novelist.id),
+        Book(
+            title='casmurro casmurro casmurro',
+            year=1900,
+            novelist_id=novelist.id,
+        ),
+        Book(title='iracema', year=1865, novelist_id=novelist.id),
+    ])
+    await sqlite_session.commit()
+
+    query = apply_search(select(Book), Book, 'title', 'Casm', 'sqlite')
+    books = (await sqlite_session.scalars(query)).all()
+
+    assert [book.title for book in books] == [
+        'casmurro casmurro casmurro',
+        'dom casmurro',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_fts5_index_follows_updates(sqlite_session):
+    novelist = Novelist(name='machado de assis')
+    sqlite_session.add(novelist)
+    await sqlite_session.commit()
+
+    novelist.name = 'jose de alencar'
+    await sqlite_session.commit()
+
+    old = apply_search(select(Novelist), Novelist, 'name', 'assis', 'sqlite')
+    new = apply_search(select(Novelist), Novelist, 'name', 'alencar', 'sqlite')
+
+    assert (await sqlite_session.scalars(old)).all() == []
+    assert (await sqlite_session.scalars(new)).all() == [novelist]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_fts5_searches_normalized_keys(sqlite_session):
+    novelist = Novelist(name="Eugene O'Neill")
+    sqlite_session.add(novelist)
+    await sqlite_session.commit()
+
+    for term in ("O'Neill", 'oneill', 'EUGENE'):
+        query = apply_search(
+            select(Novelist), Novelist, 'name', term, 'sqlite'
+        )
+
+        assert (await sqlite_session.scalars(query)).all() == [novelist]
+
+
+def test_search_without_words_matches_nothing():
+    query = apply_search(select(Book), Book, 'title', '!!!', 'postgresql')
+
+    assert 'false' in str(query).lower()
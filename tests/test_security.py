@@ -1,8 +1,15 @@
 from http import HTTPStatus
 
-from jwt import decode
+import pytest
+from freezegun import freeze_time
+from jwt import ExpiredSignatureError, decode
 
-from madr_fastapi.security import create_access_token
+from madr_fastapi.security import (
+    create_access_token,
+    decode_access_token,
+    revoke_user_tokens,
+    token_cache,
+)
 
 
 def test_jwt(settings):
@@ -51,3 +58,79 @@ def test_get_current_user_does_not_exists(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials.'}
+
+
+def test_get_current_user_uses_principal_cache(
+    client, user, token, statements
+):
+    client.get(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+    statements.clear()
+
+    response = client.get(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(statements) == 1
+
+
+def test_decode_access_token_is_cached():
+    token = create_access_token({'sub': 'cached@test.com'})
+    hits = token_cache.hits
+
+    first = decode_access_token(token)
+    second = decode_access_token(token)
+
+    assert first == second
+    assert token_cache.hits == hits + 1
+
+
+def test_token_cache_respects_token_expiration():
+    with freeze_time('2023-07-14 12:00:00'):
+        token = create_access_token({'sub': 'cached@test.com'})
+        decode_access_token(token)
+
+    with freeze_time('2023-07-14 13:01:00'):
+        with pytest.raises(ExpiredSignatureError):
+            decode_access_token(token)
+
+
+@pytest.mark.asyncio
+async def test_revoked_user_tokens_are_rejected(client, session, user, token):
+    await revoke_user_tokens(session, user)
+
+    response = client.get(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json() == {'detail': 'Could not validate credentials.'}
+
+
+def test_token_for_another_user_id_is_rejected(client, user):
+    token = create_access_token({'sub': user.email, 'uid': user.id + 1})
+
+    response = client.get(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_token_cache_metrics(client, user, token):
+    client.get(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response = client.get('/metrics/token-cache')
+
+    assert response.status_code == HTTPStatus.OK
+    assert set(response.json()) == {
+        'size',
+        'maxsize',
+        'hits',
+        'misses',
+        'evictions',
+    }
@@ -0,0 +1,128 @@
+import pytest
+
+from madr_fastapi import serve
+from madr_fastapi.settings import Settings
+
+
+@pytest.mark.parametrize(
+    ('files', 'expected'),
+    [
+        ({'cpu.max': '200000 100000\n'}, 2.0),
+        ({'cpu.max': '150000 100000\n'}, 1.5),
+        ({'cpu.max': 'max 100000\n'}, None),
+        (
+            {
+                'cpu/cpu.cfs_quota_us': '400000\n',
+                'cpu/cpu.cfs_period_us': '100000\n',
+            },
+            4.0,
+        ),
+        (
+            {
+                'cpu/cpu.cfs_quota_us': '-1\n',
+                'cpu/cpu.cfs_period_us': '100000\n',
+            },
+            None,
+        ),
+        ({}, None),
+    ],
+)
+def test_cpu_quota(tmp_path, files, expected):
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    assert serve.cpu_quota(tmp_path) == expected
+
+
+def test_available_cpus_rounds_quota_up(tmp_path, monkeypatch):
+    monkeypatch.setattr(serve.os, 'sched_getaffinity', lambda pid: range(8))
+    (tmp_path / 'cpu.max').write_text('150000 100000\n')
+
+    assert serve.available_cpus(tmp_path) == 2  # noqa: PLR2004
+    assert serve.available_cpus(tmp_path / 'missing') == 8  # noqa: PLR2004
+
+
+SHARED_CACHES = {
+    'PRINCIPAL_CACHE_URL': 'redis://cache',
+    'RESPONSE_CACHE_URL': 'redis://cache',
+}
+
+
+def test_uvicorn_options_from_settings(monkeypatch):
+    monkeypatch.setattr(serve, 'available_cpus', lambda: 3)
+    settings = Settings(
+        SERVER_MAX_REQUESTS=0, SERVER_KEEP_ALIVE=30, **SHARED_CACHES
+    )
+
+    options = serve.uvicorn_options(settings)
+
+    assert options['workers'] == 3  # noqa: PLR2004
+    assert options['loop'] == 'uvloop'
+    assert options['http'] == 'httptools'
+    assert options['timeout_keep_alive'] == 30  # noqa: PLR2004
+    assert options['limit_max_requests'] is None
+
+
+def test_only_multiple_workers_are_recycled(monkeypatch):
+    monkeypatch.setattr(serve, 'available_cpus', lambda: 2)
+
+    single = serve.uvicorn_options(Settings(SERVER_WORKERS=1))
+    multiple = serve.uvicorn_options(Settings(**SHARED_CACHES))
+
+    assert single['limit_max_requests'] is None
+    assert multiple['limit_max_requests'] == 10_000  # noqa: PLR2004
+
+
+def test_auto_sized_workers_fall_back_without_shared_caches(monkeypatch):
+    monkeypatch.setattr(serve, 'available_cpus', lambda: 4)
+
+    assert serve.worker_count(Settings()) == 1
+    assert serve.worker_count(Settings(**SHARED_CACHES)) == 4  # noqa: PLR2004
+    assert (
+        serve.worker_count(
+            Settings(**SHARED_CACHES, READ_DATABASE_URLS=['sqlite://'])
+        )
+        == 1
+    )
+
+
+def test_explicit_workers_refuse_to_start_without_shared_caches():
+    with pytest.raises(SystemExit, match='RESPONSE_CACHE_URL'):
+        serve.worker_count(
+            Settings(SERVER_WORKERS=2, PRINCIPAL_CACHE_URL='redis://cache')
+        )
+
+    assert serve.worker_count(Settings(SERVER_WORKERS=1)) == 1
+
+
+def test_each_worker_draws_its_own_request_limit(monkeypatch):
+    monkeypatch.setattr(serve.uvicorn.Server, 'run', lambda self, sockets: 0)
+    limits = set()
+    for _ in range(20):
+        config = serve.uvicorn.Config(serve.APP, limit_max_requests=100)
+        serve.JitteredServer(config, max_requests_jitter=50).run()
+        limits.add(config.limit_max_requests)
+
+    assert len(limits) > 1
+    assert all(100 <= limit <= 150 for limit in limits)  # noqa: PLR2004
+
+
+def test_main_migrates_before_starting_workers(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        serve, 'run_migrations', lambda config: calls.append('migrate')
+    )
+    monkeypatch.setattr(
+        serve,
+        'serve',
+        lambda options, jitter: calls.append((options['workers'], jitter)),
+    )
+    for name, url in SHARED_CACHES.items():
+        monkeypatch.setenv(name, url)
+
+    serve.main(['--workers', '4'])
+    serve.main(['--workers', '2', '--no-migrate'])
+
+    assert calls == ['migrate', (4, 1000), (2, 1000)]
@@ -1,6 +1,13 @@
+import json
 from http import HTTPStatus
 
+import pytest
+
+from madr_fastapi.pagination import encode_cursor
 from madr_fastapi.schemas import UserPublic
+from tests.conftest import UserFactory
+
+BOB = {'username': 'bob', 'email': 'bob@test.com', 'password': 'x'}
 
 
 def test_create_user(client):
@@ -29,7 +36,11 @@ def test_read_users(client, user, token):
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {
+        'users': [user_schema],
+        'next_cursor': None,
+        'total': None,
+    }
 
 
 def test_update_user(client, user, token):
@@ -51,6 +62,46 @@ def test_update_user(client, user, token):
     }
 
 
+def test_update_user_accepts_tokens_issued_afterwards(client, user, token):
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'alice nery',
+            'email': user.email,
+            'password': 'a brand new secret',
+        },
+    )
+    new_token = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': 'a brand new secret'},
+    ).json()['access_token']
+
+    response = client.get(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {new_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_update_user_password_revokes_token(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={
+            'username': user.username,
+            'email': user.email,
+            'password': 'a brand new secret',
+        },
+    )
+
+    response = client.get(f'/users/{user.id}', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
 def test_read_user(client, user, token):
     response = client.get(
         f'/users/{user.id}',
@@ -89,6 +140,20 @@ def test_username_already_exists_create_user(client, user):
     assert response.json() == {'detail': 'Username already exists.'}
 
 
+def test_username_key_is_case_and_punctuation_insensitive(client, user):
+    response = client.post(
+        '/users',
+        json={
+            'username': f' {user.username.upper()}!',
+            'email': 'alice@example.com',
+            'password': 'secret',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Username already exists.'}
+
+
 def test_email_already_exists_create_user(client, user):
     response = client.post(
         '/users',
@@ -103,6 +168,22 @@ def test_email_already_exists_create_user(client, user):
     assert response.json() == {'detail': 'Email already exists.'}
 
 
+def test_conflict_ignores_column_names_in_the_values(client):
+    email = 'a.username_key@test.com'
+    client.post(
+        '/users',
+        json={'username': 'first', 'email': email, 'password': 'secret'},
+    )
+
+    response = client.post(
+        '/users',
+        json={'username': 'second', 'email': email, 'password': 'secret'},
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Email already exists.'}
+
+
 def test_update_integrity_error(client, user, other_user, token):
     response = client.put(
         f'/users/{user.id}',
@@ -141,3 +222,116 @@ def test_delete_user_with_another_user(client, other_user, token):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Unauthorized.'}
+
+
+def test_update_user_invalidates_cached_principal(client, user, token):
+    client.get(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'alice',
+            'email': 'alice@example.com',
+            'password': 'secret',
+        },
+    )
+
+    response = client.get(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_delete_user_invalidates_cached_principal(client, user, token):
+    client.delete(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response = client.get(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.parametrize(
+    ('request_args', 'expected_statements'),
+    [
+        (('POST', '/users/', BOB), 1),
+        (('PUT', '/users/1', BOB), 1),
+        (('DELETE', '/users/1', None), 1),
+    ],
+)
+def test_user_write_endpoints_statement_count(
+    client, warm_headers, statements, request_args, expected_statements
+):
+    method, url, payload = request_args
+
+    response = client.request(method, url, headers=warm_headers, json=payload)
+
+    assert response.status_code < HTTPStatus.BAD_REQUEST
+    assert len(statements) == expected_statements
+
+
+@pytest.mark.asyncio
+async def test_read_users_cursor_pagination(session, client):
+    session.add_all(UserFactory.create_batch(5))
+    await session.commit()
+
+    first_page = client.get('/users/?limit=3').json()
+    second_page = client.get(
+        f'/users/?limit=3&cursor={first_page["next_cursor"]}'
+    ).json()
+
+    ids = [user['id'] for user in first_page['users'] + second_page['users']]
+
+    assert ids == [1, 2, 3, 4, 5]
+    assert second_page['next_cursor'] is None
+
+
+@pytest.mark.usefixtures('user')
+def test_read_users_limit_zero_returns_no_users(client):
+    response = client.get('/users/?limit=0')
+
+    assert response.json()['users'] == []
+    assert response.json()['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_read_users_ndjson_stream(session, client):
+    session.add_all(UserFactory.create_batch(3))
+    await session.commit()
+
+    response = client.get('/users/?format=ndjson')
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [user['id'] for user in lines] == [1, 2, 3]
+    assert set(lines[0]) == {'id', 'username', 'email'}
+
+
+@pytest.mark.asyncio
+async def test_read_users_ndjson_stream_from_cursor(session, client):
+    session.add_all(UserFactory.create_batch(3))
+    await session.commit()
+
+    cursor = client.get('/users/?limit=1').json()['next_cursor']
+    response = client.get(f'/users/?format=ndjson&cursor={cursor}')
+
+    assert [
+        json.loads(line)['id'] for line in response.text.splitlines()
+    ] == [2, 3]
+
+
+def test_read_users_ndjson_rejects_mistyped_cursor(client):
+    response = client.get(
+        f'/users/?format=ndjson&cursor={encode_cursor("abc")}'
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Invalid cursor.'}
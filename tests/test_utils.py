@@ -0,0 +1,79 @@
+import random
+import unicodedata
+
+from madr_fastapi.utils import (
+    SANITIZE_CACHE_SIZE,
+    sanitize_name,
+    sanitize_name_cached,
+    sanitize_names,
+)
+
+ALPHABET = (
+    [chr(code) for code in range(128)]
+    + list('áéíóúãõçÁÉÍÓÚÃÕÇñÑüÜß')
+    # no-break, ideographic and thin spaces, line separator
+    + list('\u00a0\u3000\u2009\u2028')
+    # combining cedilla and acute accent
+    + list('\u0327\u0301')
+    # fullwidth, ligature and superscript forms changed by NFKC
+    + list('\uff21\uff22\uff43\uff11\ufb01\u00bd\u00b2')
+    + list('東京文学')
+    + list('—–“”’«»…')
+)
+
+
+def reference_sanitize_name(name: str) -> str:
+    s = unicodedata.normalize('NFKC', name)
+    s = ''.join(ch if not ch.isspace() else ' ' for ch in s)
+    cleaned = ''.join(
+        ch
+        for ch in s
+        if unicodedata.category(ch)[0] in {'L', 'N'} or ch == ' '
+    )
+
+    return ' '.join(cleaned.split()).lower()
+
+
+def random_names(seed: int, count: int = 2000) -> list[str]:
+    rng = random.Random(seed)
+    ascii_only = [chr(code) for code in range(128)]
+
+    return [
+        ''.join(
+            rng.choices(
+                ascii_only if rng.random() < 0.5 else ALPHABET,  # noqa: PLR2004
+                k=rng.randint(0, 30),
+            )
+        )
+        for _ in range(count)
+    ]
+
+
+def test_sanitize_name_matches_reference():
+    for name in random_names(seed=2024):
+        assert sanitize_name(name) == reference_sanitize_name(name), repr(name)
+
+
+def test_sanitize_names_matches_sanitize_name():
+    names = random_names(seed=7)
+    ascii_names = [name for name in names if name.isascii()]
+
+    assert sanitize_names(names) == [reference_sanitize_name(n) for n in names]
+    assert sanitize_names(iter(ascii_names)) == [
+        reference_sanitize_name(name) for name in ascii_names
+    ]
+    assert sanitize_names([]) == []
+
+
+def test_sanitize_name_keeps_non_strings():
+    assert sanitize_name(None) is None
+    assert sanitize_names(['Dom Casmurro', None]) == ['dom casmurro', None]
+
+
+def test_sanitize_name_cache_is_bounded():
+    sanitize_name_cached.cache_clear()
+
+    for name in random_names(seed=1, count=SANITIZE_CACHE_SIZE + 10):
+        sanitize_name(name)
+
+    assert sanitize_name_cached.cache_info().currsize <= SANITIZE_CACHE_SIZE